@@ -1,39 +1,168 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+import os
+import uuid
+import numpy as np
 import streamlit as st
 import pandas as pd
-import joblib
-import difflib
-from PIL import Image
-import plotly.express as px
+from almacen_predicciones import AlmacenPredicciones
+from cache_cargas import CacheCargas, huella_contenido
+from cache_predicciones import CacheLRU, predecir_unicos
+from cola_puntuacion import FILAS_POR_FRAGMENTO, ColaLlena, ColaPuntuacion
+from comparacion_modelos import estadisticas_comparacion, puntuar_modelos, resumen_modelos
+from estadisticas import AcumuladorEstadisticas, figura_histograma
+from exportacion import exportar_bytes, formatos_exportacion
+from instrumentacion import Instrumentacion
+from mejores_k import MejoresK, seleccionar_mejores
+from motor_paralelo import UMBRAL_PARALELO, MotorParalelo
+from preprocesamiento import preprocess_dataframe, vocabulario_modelo
+from puntuacion_incremental import PuntuacionPrevia, filas_cambiadas
+from utilidades_modelo import (
+    cargar_modelos, columnas_modelo, rutas_modelos
+)
+from vista_resultados import ResultadosIndexados, mostrar_resultados
 
 @st.cache_resource
 def load_models():
-    modelos = {
-        'Modelo Regresión Logística': joblib.load('modelo_BLAA.pkl')
+    return cargar_modelos()
+
+@st.cache_resource
+def imagen_encabezado():
+    # Bytes del JPEG tal cual: st.image no tiene que decodificarlo ni recodificarlo en cada rerun
+    with open('img/banrep.jpeg', 'rb') as archivo:
+        return archivo.read()
+
+@st.cache_resource
+def estilos_css():
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'estilos.css'), encoding='utf-8') as archivo:
+        return archivo.read()
+
+@st.cache_resource
+def obtener_cache_cargas():
+    # Archivos ya leídos y normalizados, compartidos entre reruns y sesiones
+    return CacheCargas()
+
+# Lo que se construye por modelo vive como anexo de su entrada en el registro: cuenta en el
+# presupuesto de memoria y se descarta cuando el modelo se desaloja (ver registro_modelos)
+def obtener_vocabulario(nombre_modelo):
+    return load_models().anexo(nombre_modelo, 'vocabulario', vocabulario_modelo)
+
+def obtener_cache_predicciones(nombre_modelo):
+    # Compartida entre reruns y sesiones: una caché por modelo
+    return load_models().anexo(nombre_modelo, 'cache_predicciones', lambda modelo: CacheLRU())
+
+def obtener_almacen_predicciones(nombre_modelo):
+    # Persiste entre reinicios; se invalida solo si cambia el archivo del modelo
+    return load_models().anexo(
+        nombre_modelo, 'almacen_predicciones', lambda modelo: AlmacenPredicciones(rutas_modelos[nombre_modelo])
+    )
+
+def obtener_motor_paralelo(nombre_modelo, procesos):
+    # Un pool por modelo (el número de procesos no forma parte de la clave); ver redimensionar.
+    # Al desalojarse, sus procesos terminan cuando nadie más lo usa
+    return load_models().anexo(
+        nombre_modelo, 'motor_paralelo', lambda modelo: MotorParalelo(procesos, rutas_modelos[nombre_modelo])
+    )
+
+@st.cache_resource
+def obtener_cola_puntuacion():
+    # Una sola cola por proceso: limita cuántas predicciones corren a la vez entre todas las sesiones
+    return ColaPuntuacion()
+
+# Refresco de la vista de avance y espera antes de mostrarla (las predicciones cortas no la necesitan)
+INTERVALO_AVANCE_S = 0.5
+ESPERA_INICIAL_S = 0.5
+FILAS_PARCIALES = 10
+
+def probabilidades_parciales(en_curso):
+    """Probabilidades de todas las filas: reutilizadas, ya calculadas o NaN si aún faltan"""
+    probabilidades = en_curso['probabilidades'].copy()
+    probabilidades[en_curso['cambiadas']] = en_curso['trabajo'].probabilidades
+    return probabilidades
+
+def valores_originales(en_curso, filas=None):
+    """Columnas puntuadas con los valores tal como se cargaron, no con las grafías canonizadas"""
+    original = en_curso['original'] if filas is None else en_curso['original'].iloc[filas]
+    return original[list(en_curso['df'].columns)].copy()
+
+def terminar_prediccion(en_curso, top_k):
+    """Guarda los resultados de un trabajo terminado; si se canceló, solo los de las filas calculadas"""
+    st.session_state.prediccion_en_curso = None
+    trabajo = en_curso['trabajo']
+    if trabajo.error is not None:
+        raise trabajo.error
+    probabilidades = probabilidades_parciales(en_curso)
+    huellas = en_curso['huellas']
+    listas = ~np.isnan(probabilidades)
+    if not listas.any():
+        return
+    pendientes = int(np.count_nonzero(~listas))
+    if pendientes:
+        result_df = valores_originales(en_curso, np.flatnonzero(listas))
+        huellas, probabilidades = huellas[listas], probabilidades[listas]
+    else:
+        result_df = valores_originales(en_curso)
+    # Al volver a predecir se reutilizan también las filas de un trabajo cancelado
+    en_curso['previa'].reemplazar(huellas, probabilidades)
+    result_df['Probabilidad'] = probabilidades.round(5)
+    if top_k:
+        # Las estadísticas cubren todo el catálogo; la tabla, solo los K mejores
+        result_df = MejoresK(int(top_k)).agregar(result_df).resultado()
+    # Los resultados quedan en el servidor para paginar sin volver a predecir
+    st.session_state.resultados = {
+        'entrada': en_curso['entrada'],
+        'modelo': en_curso['modelo'],
+        'top_k': top_k,
+        'estadisticas': AcumuladorEstadisticas.desde(probabilidades),
+        'indexados': ResultadosIndexados(result_df),
+        'calculadas': trabajo.filas_hechas,
+        'pendientes': pendientes,
+        'exportaciones': {}
     }
-    return modelos
 
-columnas_modelo = ['Categoria', 'Author', 'Publisher']
+@st.fragment(run_every=INTERVALO_AVANCE_S)
+def mostrar_avance():
+    """Avance de la predicción en curso con resultados parciales; se refresca sola sin rerun completo"""
+    en_curso = st.session_state.get('prediccion_en_curso')
+    if en_curso is None:
+        return
+    trabajo = en_curso['trabajo']
+    if trabajo.terminado:
+        # El rerun completo guarda y muestra los resultados
+        st.rerun()
 
-def corregir_nombres_columnas(df, columnas_objetivo):
-    """Corrige nombres de columnas usando coincidencias aproximadas"""
-    df_renombrado = df.copy()
-    columnas_actuales = df.columns.tolist()
-    mapeo = {}
-    for col_obj in columnas_objetivo:
-        match = difflib.get_close_matches(col_obj, columnas_actuales, n=1, cutoff=0.8)
-        if match:
-            mapeo[match[0]] = col_obj
-    if mapeo:
-        df_renombrado = df_renombrado.rename(columns=mapeo)
-    return df_renombrado, list(mapeo.keys())
+    st.subheader("⏳ Predicción en curso")
+    texto = "⏹️ Cancelando..." if trabajo.cancelado else trabajo.descripcion()
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        st.progress(trabajo.progreso, text=texto)
+    with col2:
+        if st.button("⏹️ Cancelar", key="cancelar_prediccion", disabled=trabajo.cancelado,
+                     use_container_width=True):
+            obtener_cola_puntuacion().cancelar(trabajo)
+            st.rerun()
 
-def preprocess_dataframe(df):
-    """Preprocesa el DataFrame para el modelo"""
-    df_processed = df.copy()
-    return df_processed
+    probabilidades = probabilidades_parciales(en_curso)
+    listas = np.flatnonzero(~np.isnan(probabilidades))
+    if not listas.size:
+        return
+    parciales = AcumuladorEstadisticas.desde(probabilidades[listas])
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Filas con predicción", f"{parciales.total:,} de {len(probabilidades):,}")
+    with col2:
+        st.metric("Probabilidad Promedio (parcial)", f"{parciales.promedio:.5f}")
+    with col3:
+        st.metric("Alta Demanda (>70%)", parciales.alta)
+    with col4:
+        st.metric("Baja Demanda (<30%)", parciales.baja)
+    mejores = listas[seleccionar_mejores(probabilidades[listas], listas, FILAS_PARCIALES)]
+    st.caption(f"Las {len(mejores)} filas más probables hasta ahora")
+    st.dataframe(
+        valores_originales(en_curso, mejores).assign(Probabilidad=probabilidades[mejores].round(5)),
+        use_container_width=True
+    )
 
 def main():
     st.set_page_config(
@@ -42,14 +171,16 @@ def main():
         layout="wide",
         initial_sidebar_state="expanded"
     )
+    st.session_state.setdefault('id_sesion', uuid.uuid4().hex)
+    st.session_state.ejecuciones = st.session_state.get('ejecuciones', 0) + 1
+    inst = Instrumentacion(f"{st.session_state.id_sesion[:8]}-{st.session_state.ejecuciones}")
     
     # Header con imagen y título mejorado
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
         try:
-            image = Image.open('img/banrep.jpeg')
-            st.image(image, width=250, use_container_width=False)
-        except:
+            st.image(imagen_encabezado(), width=250, use_container_width=False)
+        except OSError:
             st.warning("⚠️ Imagen no encontrada: img/banrep.jpeg")
     
     # Espaciado adicional después de la imagen
@@ -58,59 +189,16 @@ def main():
     st.title("📚 Sistema de Predicción de Libros Solicitados")
     st.markdown("---")
     
-    # CSS personalizado mejorado
-    st.markdown("""
-    <style>
-    .main-header {
-        background: linear-gradient(90deg, #1f77b4, #ff7f0e);
-        padding: 1rem;
-        border-radius: 10px;
-        color: white;
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-    .metric-card {
-        background-color: #f0f2f6;
-        padding: 1rem;
-        border-radius: 10px;
-        border-left: 5px solid #1f77b4;
-    }
-    .upload-section {
-        background-color: #f8f9fa;
-        padding: 2rem;
-        border-radius: 10px;
-        border: 2px dashed #dee2e6;
-    }
-    .prediction-section {
-        background-color: #e8f5e8;
-        padding: 1.5rem;
-        border-radius: 10px;
-        border: 1px solid #28a745;
-    }
-    /* Estilo para mejorar la imagen del header */
-    [data-testid="stImage"] > img {
-        border-radius: 15px;
-        box-shadow: 0 4px 12px rgba(0, 0, 0, 0.15);
-        border: 3px solid #ffffff;
-        transition: transform 0.3s ease;
-    }
-    [data-testid="stImage"] > img:hover {
-        transform: scale(1.02);
-    }
-    /* Mejoras adicionales para el título */
-    .main > div:first-child h1 {
-        text-align: center;
-        color: #1f77b4;
-        font-weight: 700;
-        margin-top: 1rem;
-        margin-bottom: 1rem;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    # CSS personalizado mejorado (estilos.css se lee una vez por proceso)
+    st.markdown(f"<style>\n{estilos_css()}</style>", unsafe_allow_html=True)
 
     # Inicializar session_state para almacenar df_input
     if 'df_input' not in st.session_state:
         st.session_state.df_input = None
+    # Identifica los datos de entrada para invalidar resultados; el DataFrame puede volver a
+    # leerse en cada rerun si no cabe en la caché de cargas, así que no sirve su identidad
+    if 'token_entrada' not in st.session_state:
+        st.session_state.token_entrada = None
 
     # Información importante en un contenedor destacado
     with st.container():
@@ -119,7 +207,8 @@ def main():
         st.markdown('</div>', unsafe_allow_html=True)
 
     # Cargar modelos
-    modelos = load_models()
+    with inst.tramo('carga_modelos'):
+        modelos = load_models()
     
     # Sidebar para configuración
     with st.sidebar:
@@ -135,13 +224,50 @@ def main():
         )
         
         st.success(f"✅ **{modelo_seleccionado}**")
-        modelo = modelos[modelo_seleccionado]
+        procesos = st.number_input(
+            "Procesos de predicción",
+            min_value=1, max_value=os.cpu_count() or 1, value=1, step=1,
+            help=f"Se usan varios procesos solo con {UMBRAL_PARALELO:,} filas o más"
+        )
+        stats_cola = obtener_cola_puntuacion().estadisticas()
+        st.caption(
+            f"Predicciones en curso en el servidor: {stats_cola['trabajos_activos']} "
+            f"({stats_cola['hilos']} trabajadores compartidos)"
+        )
+        modelos_comparados = st.multiselect(
+            "⚖️ Comparar con",
+            options=[nombre for nombre in modelos if nombre != modelo_seleccionado],
+            key="modelos_comparados",
+            help="Puntúa los mismos datos con varios modelos y muestra su grado de acuerdo"
+        )
+        top_k = st.number_input(
+            "Mostrar solo los K más probables",
+            min_value=0, value=0, step=10, key="top_k",
+            help="0 muestra todas las filas; con K > 0 los resultados conservan solo los K libros más probables"
+        )
+        
+        cache_predicciones = obtener_cache_predicciones(modelo_seleccionado)
+        with st.expander("🗃️ Caché de predicciones"):
+            stats_cache = cache_predicciones.estadisticas()
+            st.write(f"• **Entradas:** {stats_cache['entradas']:,}")
+            st.write(f"• **Aciertos:** {stats_cache['aciertos']:,}")
+            st.write(f"• **Fallos:** {stats_cache['fallos']:,}")
+            st.write(f"• **Tasa de aciertos:** {stats_cache['tasa_aciertos']:.1%}")
+        
+        mostrar_tiempos = st.checkbox(
+            "⏱️ Mostrar tiempos",
+            help="Duración y memoria de cada etapa en esta ejecución"
+        )
+        panel_tiempos = st.empty()
         
         st.markdown("---")
         st.subheader("📊 Información del Modelo")
         st.write("• **Tipo:** Regresión Logística")
         st.write("• **Salida:** Probabilidades (0-1)")
         st.write("• **Variables:** Categoría, Autor, Editorial")
+        stats_modelos = modelos.estadisticas()
+        st.write(f"• **Modelos en memoria:** {stats_modelos['cargados']} de {stats_modelos['disponibles']} "
+                 f"({stats_modelos['mb_usados']:,.1f} MB de {stats_modelos['mb_presupuesto']:,.0f} MB)")
     
     # Opciones de entrada con mejor diseño
     st.header("📊 Datos de Entrada")
@@ -155,43 +281,27 @@ def main():
     with tab1:
         st.markdown('<div class="upload-section">', unsafe_allow_html=True)
         uploaded_file = st.file_uploader(
-            "📁 Arrastra y suelta tu archivo CSV o Excel aquí", 
-            type=['csv', 'xlsx'], 
+            "📁 Arrastra y suelta tu archivo CSV, Excel, Parquet o Arrow aquí", 
+            type=['csv', 'xlsx', 'parquet', 'feather', 'arrow'], 
             key="file_uploader",
-            help="Formatos soportados: CSV, Excel (.xlsx)"
+            help="Formatos soportados: CSV, Excel (.xlsx), Parquet, Arrow/Feather"
         )
         st.markdown('</div>', unsafe_allow_html=True)
 
     if uploaded_file:
         try:
-            if uploaded_file.name.endswith('.csv'):
-                st.session_state.df_input = pd.read_csv(uploaded_file)
-            else:
-                st.session_state.df_input = pd.read_excel(uploaded_file)
-
-            # Mapeo manual de columnas (normalización básica)
-            mapeo_columnas = {
-                'editorial': 'Publisher',
-                'autor': 'Author',
-                'AUTOR': 'Author',
-                'autor(a)': 'Author',
-                'autor/a': 'Author',
-                'categoria': 'Categoria',
-                'Area Tematica': 'Categoria',
-                'ÁREA TEMÁTICA':'Categoria',
-                'publicador': 'Publisher',
-                'publisher': 'Publisher',
-                'EDITORIAL':'Publisher'
-            }
-
-            # Limpiar espacios y aplicar renombramiento
-            st.session_state.df_input.columns = [col.strip() for col in st.session_state.df_input.columns]
-            st.session_state.df_input = st.session_state.df_input.rename(
-                columns=lambda x: mapeo_columnas.get(x.lower(), x)
-            )
-
-            # Corrección de nombres parecidos (difflib)
-            df_input, corregidas = corregir_nombres_columnas(st.session_state.df_input, columnas_modelo)
+            # El archivo se hashea y se lee una vez por carga, no en cada rerun. La sesión conserva
+            # su propio DataFrame: los que superan el presupuesto de la caché compartida no se guardan ahí
+            carga_actual = st.session_state.get('carga_actual')
+            if carga_actual is None or carga_actual[0] != uploaded_file.file_id:
+                huella = huella_contenido(uploaded_file.getvalue())
+                with inst.tramo('lectura_archivo', archivo=uploaded_file.name, bytes=uploaded_file.size):
+                    df_input, corregidas = obtener_cache_cargas().obtener_o_leer(
+                        uploaded_file.name, uploaded_file.getvalue(), huella
+                    )
+                carga_actual = (uploaded_file.file_id, huella, df_input, corregidas)
+                st.session_state.carga_actual = carga_actual
+            _, _, df_input, corregidas = carga_actual
 
             if corregidas:
                 st.success(f"Se renombraron automáticamente estas columnas: {', '.join(corregidas)}")
@@ -201,11 +311,15 @@ def main():
             if not columnas_presentes:
                 st.error("⚠️ El archivo no contiene ninguna de las columnas requeridas para el modelo.")
                 st.session_state.df_input = None
+                st.session_state.token_entrada = None
             else:
                 st.session_state.df_input = df_input  # Actualizar con correcciones
+                st.session_state.token_entrada = carga_actual[1]
 
         except Exception as e:
             st.error(f"Error al procesar el archivo: {str(e)}")
+    else:
+        st.session_state.carga_actual = None
 
     with tab2:
         st.markdown('<div class="upload-section">', unsafe_allow_html=True)
@@ -239,6 +353,7 @@ def main():
                 if all(len(data_manual[col]) == int(num_filas) and all(val.strip() for val in data_manual[col]) 
                        for col in data_manual):
                     st.session_state.df_input = pd.DataFrame(data_manual)
+                    st.session_state.token_entrada = uuid.uuid4().hex
                     st.success("✅ DataFrame creado correctamente")
                 else:
                     st.warning("⚠️ Asegúrate de llenar todas las filas completamente.")
@@ -250,10 +365,13 @@ def main():
         st.header("📋 Datos a Evaluar")
         
         try:
-            df_processed = preprocess_dataframe(st.session_state.df_input)
+            with inst.tramo('preprocesamiento', filas=len(st.session_state.df_input)):
+                df_processed = preprocess_dataframe(
+                    st.session_state.df_input, obtener_vocabulario(modelo_seleccionado)
+                )
             
             # Mostrar datos en un contenedor estilizado
-            with st.container():
+            with st.container(), inst.tramo('vista_previa'):
                 st.subheader(f"📊 Vista previa ({len(df_processed)} registros)")
                 st.dataframe(df_processed, use_container_width=True)
             
@@ -266,95 +384,246 @@ def main():
                     key="predict_button",
                     use_container_width=True
                 )
+                comparar_button = bool(modelos_comparados) and st.button(
+                    f"⚖️ Comparar {len(modelos_comparados) + 1} modelos",
+                    key="comparar_button",
+                    use_container_width=True
+                )
             
             if predict_button:
-                with st.spinner('🔄 Procesando predicciones...'):
-                    probabilidades = modelo.predict_proba(df_processed)[:, 1]
-                    probabilidades_formateadas = [round(prob, 5) for prob in probabilidades]
-                    
-                    result_df = df_processed.copy()
-                    result_df['Probabilidad'] = probabilidades_formateadas
-                    
-                    # Resultados en contenedor estilizado
-                    st.markdown("---")
-                    st.markdown('<div class="prediction-section">', unsafe_allow_html=True)
-                    st.header(f"🎯 Resultados - {modelo_seleccionado}")
-                    
-                    # Tabla de resultados con colores
-                    st.subheader("📋 Predicciones Detalladas")
-                    st.dataframe(
-                        result_df.style.background_gradient(subset=['Probabilidad'], cmap='RdYlGn'),
-                        use_container_width=True
+                anterior = st.session_state.get('prediccion_en_curso')
+                if anterior is not None:
+                    # El fragmento que ya se está calculando ocupa el cupo de la sesión hasta terminar;
+                    # sus filas se guardan y la nueva predicción solo calcula las que falten
+                    obtener_cola_puntuacion().cancelar(anterior['trabajo'])
+                    anterior['trabajo'].esperar()
+                    terminar_prediccion(anterior, top_k)
+                with inst.tramo('prediccion', filas=len(df_processed)) as tramo:
+                    if procesos > 1 and len(df_processed) >= UMBRAL_PARALELO:
+                        motor = obtener_motor_paralelo(modelo_seleccionado, int(procesos))
+                        motor.redimensionar(int(procesos))
+                        filas_por_fragmento = UMBRAL_PARALELO
+                    else:
+                        # El registro carga el modelo la primera vez que se usa, no al pintar la página
+                        with inst.tramo('carga_modelo', modelo=modelo_seleccionado):
+                            motor = modelos[modelo_seleccionado]
+                        filas_por_fragmento = FILAS_POR_FRAGMENTO
+                    niveles = [cache_predicciones, obtener_almacen_predicciones(modelo_seleccionado)]
+                    # Solo se predicen las filas nuevas o modificadas respecto a la última predicción
+                    previas = st.session_state.setdefault('puntuaciones_previas', {})
+                    previa = previas.setdefault(modelo_seleccionado, PuntuacionPrevia())
+                    huellas, probabilidades, cambiadas = filas_cambiadas(df_processed, previa)
+                    # La predicción corre en segundo plano en los trabajadores compartidos
+                    try:
+                        trabajo = obtener_cola_puntuacion().enviar(
+                            st.session_state.id_sesion, df_processed.iloc[cambiadas],
+                            lambda fragmento: predecir_unicos(motor, fragmento, niveles),
+                            filas_por_fragmento
+                        )
+                    except ColaLlena as e:
+                        st.warning(f"⏳ {e}")
+                    else:
+                        st.session_state.prediccion_en_curso = {
+                            'trabajo': trabajo,
+                            'entrada': st.session_state.token_entrada,
+                            'modelo': modelo_seleccionado,
+                            'df': df_processed,
+                            'original': st.session_state.df_input,
+                            'previa': previa,
+                            'huellas': huellas,
+                            'probabilidades': probabilidades,
+                            'cambiadas': cambiadas
+                        }
+                        # Las predicciones cortas terminan aquí mismo, sin pasar por la vista de avance
+                        trabajo.esperar(ESPERA_INICIAL_S)
+                        tramo['calculadas'] = len(cambiadas)
+            
+            en_curso = st.session_state.get('prediccion_en_curso')
+            if en_curso is not None and (
+                en_curso['entrada'] != st.session_state.token_entrada
+                or en_curso['modelo'] != modelo_seleccionado
+            ):
+                # Cambiaron los datos o el modelo: la predicción en curso ya no aplica.
+                # Se espera al fragmento en cálculo para que el cupo de la sesión quede libre
+                obtener_cola_puntuacion().cancelar(en_curso['trabajo'])
+                en_curso['trabajo'].esperar()
+                en_curso = st.session_state.prediccion_en_curso = None
+            if en_curso is not None and en_curso['trabajo'].terminado:
+                trabajo = en_curso['trabajo']
+                with inst.tramo('resultados_prediccion', filas=trabajo.total,
+                                segundos_trabajo=round(trabajo.fin - trabajo.creado, 3)):
+                    terminar_prediccion(en_curso, top_k)
+                en_curso = None
+            if en_curso is not None:
+                mostrar_avance()
+            
+            resultados = st.session_state.get('resultados')
+            if resultados is not None and (
+                resultados['entrada'] != st.session_state.token_entrada
+                or resultados['modelo'] != modelo_seleccionado
+                or resultados['top_k'] != top_k
+            ):
+                # Resultados de otros datos, otro modelo u otro K: ya no aplican
+                resultados = st.session_state.resultados = None
+            
+            if resultados is not None:
+                estadisticas = resultados['estadisticas']
+                
+                # Resultados en contenedor estilizado
+                st.markdown("---")
+                st.markdown('<div class="prediction-section">', unsafe_allow_html=True)
+                st.header(f"🎯 Resultados - {modelo_seleccionado}")
+                if resultados['pendientes']:
+                    st.warning(
+                        f"⏹️ Predicción cancelada: resultados parciales de {estadisticas.total:,} de "
+                        f"{estadisticas.total + resultados['pendientes']:,} filas. Al volver a predecir "
+                        "solo se calculan las que faltan."
                     )
-                    
-                    # Gráfico interactivo con Plotly
-                    st.subheader("📈 Distribución de Probabilidades")
-                    fig = px.histogram(
-                        x=probabilidades, 
-                        nbins=20,
-                        title=f'Distribución de Probabilidades - {modelo_seleccionado}',
-                        labels={'x': 'Probabilidad', 'y': 'Frecuencia'},
-                        color_discrete_sequence=['#1f77b4']
+                reutilizadas = estadisticas.total - resultados['calculadas']
+                if reutilizadas:
+                    st.caption(
+                        f"♻️ {reutilizadas:,} de {estadisticas.total:,} filas no cambiaron desde la "
+                        f"predicción anterior; solo se calcularon {resultados['calculadas']:,}"
                     )
-                    fig.update_layout(
-                        showlegend=False,
-                        plot_bgcolor='rgba(0,0,0,0)',
-                        paper_bgcolor='rgba(0,0,0,0)'
+                
+                # Tabla de resultados con colores (solo la página visible)
+                if resultados['top_k']:
+                    st.subheader(f"🏆 Los {len(resultados['indexados']):,} libros más probables")
+                else:
+                    st.subheader("📋 Predicciones Detalladas")
+                with inst.tramo('tabla_resultados'):
+                    mostrar_resultados(resultados['indexados'])
+                
+                # Gráfico a partir de los conteos precalculados (no del vector completo)
+                st.subheader("📈 Distribución de Probabilidades")
+                with inst.tramo('histograma'):
+                    fig = figura_histograma(
+                        estadisticas, f'Distribución de Probabilidades - {modelo_seleccionado}'
                     )
                     st.plotly_chart(fig, use_container_width=True)
-                    
-                    # Métricas mejoradas
-                    st.subheader("📊 Estadísticas del Modelo")
-                    col1, col2, col3, col4 = st.columns(4)
-                    with col1:
-                        st.metric(
-                            "Probabilidad Promedio", 
-                            f"{probabilidades.mean():.5f}",
-                            help="Valor promedio de todas las predicciones"
-                        )
-                    with col2:
-                        st.metric(
-                            "Probabilidad Máxima", 
-                            f"{probabilidades.max():.5f}",
-                            help="Mayor probabilidad predicha"
-                        )
-                    with col3:
-                        st.metric(
-                            "Probabilidad Mínima", 
-                            f"{probabilidades.min():.5f}",
-                            help="Menor probabilidad predicha"
-                        )
-                    with col4:
-                        st.metric(
-                            "Total Registros", 
-                            f"{len(result_df)}",
-                            help="Número total de predicciones realizadas"
-                        )
-                    
-                    # Análisis adicional
-                    alta_probabilidad = (probabilidades > 0.7).sum()
-                    media_probabilidad = ((probabilidades >= 0.3) & (probabilidades <= 0.7)).sum()
-                    baja_probabilidad = (probabilidades < 0.3).sum()
-                    
-                    st.subheader("🎯 Análisis de Resultados")
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.metric("Alta Demanda (>70%)", alta_probabilidad, help="Libros con alta probabilidad de ser solicitados")
-                    with col2:
-                        st.metric("Demanda Media (30-70%)", media_probabilidad, help="Libros con probabilidad moderada")
-                    with col3:
-                        st.metric("Baja Demanda (<30%)", baja_probabilidad, help="Libros con baja probabilidad")
-                    
-                    # Botón de descarga mejorado
-                    csv = result_df.to_csv(index=False)
+                
+                # Métricas mejoradas
+                st.subheader("📊 Estadísticas del Modelo")
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric(
+                        "Probabilidad Promedio", 
+                        f"{estadisticas.promedio:.5f}",
+                        help="Valor promedio de todas las predicciones"
+                    )
+                with col2:
+                    st.metric(
+                        "Probabilidad Máxima", 
+                        f"{estadisticas.maximo:.5f}",
+                        help="Mayor probabilidad predicha"
+                    )
+                with col3:
+                    st.metric(
+                        "Probabilidad Mínima", 
+                        f"{estadisticas.minimo:.5f}",
+                        help="Menor probabilidad predicha"
+                    )
+                with col4:
+                    st.metric(
+                        "Total Registros", 
+                        f"{estadisticas.total}",
+                        help="Número total de predicciones realizadas"
+                    )
+                
+                st.subheader("🎯 Análisis de Resultados")
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Alta Demanda (>70%)", estadisticas.alta, help="Libros con alta probabilidad de ser solicitados")
+                with col2:
+                    st.metric("Demanda Media (30-70%)", estadisticas.media, help="Libros con probabilidad moderada")
+                with col3:
+                    st.metric("Baja Demanda (<30%)", estadisticas.baja, help="Libros con baja probabilidad")
+                
+                # Descarga: el archivo se genera por bloques solo cuando se pide
+                st.subheader("📥 Descargar Resultados")
+                col1, col2 = st.columns([2, 1])
+                with col1:
+                    formato_descarga = st.selectbox(
+                        "Formato de descarga", list(formatos_exportacion), key="formato_descarga"
+                    )
+                extension, mime = formatos_exportacion[formato_descarga]
+                exportaciones = resultados['exportaciones']
+                with col2:
+                    st.markdown("<br>", unsafe_allow_html=True)
+                    preparar = extension not in exportaciones and st.button(
+                        "📦 Preparar descarga", key="preparar_descarga", use_container_width=True
+                    )
+                if preparar:
+                    with st.spinner('🔄 Generando archivo...'), inst.tramo('exportacion', formato=extension):
+                        try:
+                            exportaciones[extension] = exportar_bytes(resultados['indexados'].df, extension)
+                        except ValueError as e:
+                            st.error(f"⚠️ {e}")
+                if extension in exportaciones:
                     st.download_button(
-                        "📥 Descargar Resultados CSV",
-                        csv,
-                        f"predicciones_{modelo_seleccionado.lower().replace(' ', '_')}.csv",
+                        "📥 Descargar Resultados",
+                        exportaciones[extension],
+                        f"predicciones_{modelo_seleccionado.lower().replace(' ', '_')}.{extension}",
+                        mime=mime,
                         key="download_button",
-                        help="Descargar todas las predicciones en formato CSV"
+                        on_click="ignore",
+                        help="Descargar todas las predicciones en el formato elegido"
+                    )
+                st.markdown('</div>', unsafe_allow_html=True)
+            
+            if comparar_button:
+                nombres = [modelo_seleccionado] + modelos_comparados
+                with st.spinner('🔄 Puntuando con cada modelo...'), \
+                        inst.tramo('comparacion', filas=len(df_processed), modelos=len(nombres)):
+                    # Cada modelo canoniza con su propio vocabulario: df_processed ya tiene las grafías
+                    # del modelo seleccionado y sesgaría a los demás, como en comparacion_modelos.main
+                    probabilidades = puntuar_modelos(
+                        {nombre: modelos[nombre] for nombre in nombres},
+                        preprocess_dataframe(st.session_state.df_input),
+                        {nombre: obtener_vocabulario(nombre) for nombre in nombres},
+                        {nombre: [obtener_cache_predicciones(nombre)] for nombre in nombres}
                     )
-                    st.markdown('</div>', unsafe_allow_html=True)
+                    # La tabla muestra los valores cargados; las grafías canonizadas solo se usan para puntuar
+                    tabla = st.session_state.df_input[list(df_processed.columns)].copy()
+                    for nombre in nombres:
+                        tabla[f'Probabilidad {nombre}'] = probabilidades[nombre].round(5)
+                    st.session_state.comparacion = {
+                        'entrada': st.session_state.token_entrada,
+                        'modelos': nombres,
+                        'resumen': resumen_modelos(probabilidades),
+                        'acuerdo': estadisticas_comparacion(probabilidades),
+                        'indexados': ResultadosIndexados(tabla, columna=f'Probabilidad {modelo_seleccionado}')
+                    }
+            
+            comparacion = st.session_state.get('comparacion')
+            if comparacion is not None and (
+                comparacion['entrada'] != st.session_state.token_entrada
+                or comparacion['modelos'] != [modelo_seleccionado] + modelos_comparados
+            ):
+                comparacion = st.session_state.comparacion = None
+            
+            if comparacion is not None:
+                st.markdown("---")
+                st.header("⚖️ Comparación de Modelos")
+                st.subheader("📊 Resumen por modelo")
+                st.dataframe(
+                    comparacion['resumen'].style.format({'Promedio': '{:.5f}'}),
+                    use_container_width=True
+                )
+                st.subheader("🤝 Acuerdo entre modelos")
+                st.dataframe(
+                    comparacion['acuerdo'].style.format({
+                        'Acuerdo de banda': '{:.1%}', 'Spearman': '{:.4f}',
+                        'Diferencia media': '{:.5f}', 'Diferencia máxima': '{:.5f}'
+                    }),
+                    hide_index=True, use_container_width=True
+                )
+                st.caption(
+                    "Acuerdo de banda: filas que ambos modelos ubican en la misma banda de demanda. "
+                    "Spearman: correlación entre el orden que cada modelo da a los libros."
+                )
+                st.subheader("📋 Probabilidades por modelo")
+                mostrar_resultados(comparacion['indexados'], clave='comparacion')
         except Exception as e:
             st.error(f"❌ Error al procesar los datos: {str(e)}")
     else:
@@ -380,7 +649,14 @@ def main():
                 **Formatos de archivo soportados:**
                 - CSV (separado por comas)
                 - Excel (.xlsx)
+                - Parquet y Arrow/Feather (recomendados para catálogos grandes)
                 """)
+    
+    # Panel de tiempos: se llena al final para incluir todas las etapas de la ejecución
+    if mostrar_tiempos:
+        with panel_tiempos.container():
+            st.caption(f"Total medido: {inst.total_ms():,.1f} ms")
+            st.dataframe(pd.DataFrame(inst.tramos), hide_index=True, use_container_width=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Almacén persistente de predicciones en SQLite.
+
+Guarda la probabilidad de cada combinación normalizada (Categoria, Author,
+Publisher) junto con la huella SHA-256 del archivo del modelo, de modo que un
+reinicio de la aplicación no obliga a recalcular todo. Cuando el archivo del
+modelo cambia, la huella cambia y las entradas anteriores de ese modelo se
+eliminan al abrir el almacén.
+
+Implementa la misma interfaz que ``CacheLRU`` (``obtener_muchos`` /
+``guardar_muchos``), así que se usa como un nivel más en ``predecir_unicos``.
+"""
+
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from utilidades_modelo import huella_modelo, normalizar_texto
+
+RUTA_ALMACEN = 'predicciones_cache.sqlite'
+
+# SQLite no admite NULL en claves primarias WITHOUT ROWID
+_VALOR_FALTANTE = '\x00'
+
+def _valor_sql(valor):
+    if valor is None or (isinstance(valor, float) and np.isnan(valor)):
+        return _VALOR_FALTANTE
+    return str(normalizar_texto(valor))
+
+class AlmacenPredicciones:
+    """Probabilidades persistentes por combinación para un archivo de modelo concreto"""
+
+    def __init__(self, ruta_modelo, ruta=RUTA_ALMACEN):
+        self.ruta = ruta
+        self.ruta_modelo = os.path.abspath(ruta_modelo)
+        self.huella = huella_modelo(ruta_modelo)
+        self._candado = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._conexion.executescript('''
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS modelos (
+                ruta TEXT PRIMARY KEY,
+                huella TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS predicciones (
+                huella TEXT NOT NULL,
+                categoria TEXT NOT NULL,
+                autor TEXT NOT NULL,
+                editorial TEXT NOT NULL,
+                probabilidad REAL NOT NULL,
+                PRIMARY KEY (huella, categoria, autor, editorial)
+            ) WITHOUT ROWID;
+            CREATE TEMP TABLE consulta (
+                posicion INTEGER PRIMARY KEY,
+                categoria TEXT,
+                autor TEXT,
+                editorial TEXT
+            );
+        ''')
+        self._invalidar_obsoletas()
+
+    def _invalidar_obsoletas(self):
+        """Elimina las predicciones de una versión anterior de este mismo archivo de modelo"""
+        with self._candado, self._conexion:
+            fila = self._conexion.execute(
+                'SELECT huella FROM modelos WHERE ruta = ?', (self.ruta_modelo,)
+            ).fetchone()
+            if fila and fila[0] != self.huella:
+                # Otra ruta puede apuntar a una copia idéntica del modelo anterior
+                self._conexion.execute('''
+                    DELETE FROM predicciones WHERE huella = ?
+                    AND NOT EXISTS (SELECT 1 FROM modelos WHERE huella = ? AND ruta <> ?)
+                ''', (fila[0], fila[0], self.ruta_modelo))
+            self._conexion.execute(
+                'INSERT OR REPLACE INTO modelos (ruta, huella) VALUES (?, ?)',
+                (self.ruta_modelo, self.huella)
+            )
+
+    def obtener_muchos(self, claves):
+        """Probabilidades de las claves en una sola consulta; NaN donde no hay entrada"""
+        valores = np.full(len(claves), np.nan)
+        if not claves:
+            return valores
+        filas = [(i, *map(_valor_sql, clave)) for i, clave in enumerate(claves)]
+        # Llenar la tabla temporal abre una transacción implícita; se cierra al salir para no dejar
+        # fijada la instantánea de lectura, que haría fallar la siguiente escritura con "database is locked"
+        # si otra conexión (otro modelo, o un script con --almacen) escribió mientras tanto
+        with self._candado, self._conexion:
+            self._conexion.execute('DELETE FROM temp.consulta')
+            self._conexion.executemany('INSERT INTO temp.consulta VALUES (?, ?, ?, ?)', filas)
+            resultado = self._conexion.execute('''
+                SELECT c.posicion, p.probabilidad
+                FROM temp.consulta AS c
+                JOIN predicciones AS p
+                  ON p.huella = ? AND p.categoria = c.categoria
+                 AND p.autor = c.autor AND p.editorial = c.editorial
+            ''', (self.huella,)).fetchall()
+        if resultado:
+            posiciones, probabilidades = zip(*resultado)
+            valores[list(posiciones)] = probabilidades
+        return valores
+
+    def guardar_muchos(self, claves, valores):
+        filas = [(self.huella, *map(_valor_sql, clave), float(valor))
+                 for clave, valor in zip(claves, valores)]
+        with self._candado, self._conexion:
+            self._conexion.executemany(
+                'INSERT OR REPLACE INTO predicciones VALUES (?, ?, ?, ?, ?)', filas
+            )
+
+    def cerrar(self):
+        self._conexion.close()
+
+def verificar_concurrencia(ruta_modelo, ruta):
+    """Consulta con un almacén, escribe con otro sobre el mismo archivo y vuelve a escribir con el primero"""
+    primero, segundo = AlmacenPredicciones(ruta_modelo, ruta), AlmacenPredicciones(ruta_modelo, ruta)
+    try:
+        primero.obtener_muchos([('a', 'b', 'c')])
+        segundo.guardar_muchos([('d', 'e', 'f')], [0.5])
+        primero.guardar_muchos([('a', 'b', 'c')], [0.25])
+        return list(segundo.obtener_muchos([('a', 'b', 'c'), ('d', 'e', 'f')])) == [0.25, 0.5]
+    finally:
+        primero.cerrar()
+        segundo.cerrar()
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+
+    from utilidades_modelo import RUTA_MODELO
+
+    # Verificación de regresión: dos conexiones al mismo archivo no deben bloquearse entre sí
+    with tempfile.TemporaryDirectory() as directorio:
+        correcto = verificar_concurrencia(sys.argv[1] if len(sys.argv) > 1 else RUTA_MODELO,
+                                          os.path.join(directorio, 'almacen.sqlite'))
+    print("✅ Dos conexiones escriben sin bloquearse" if correcto else "❌ Resultados inesperados")
+    sys.exit(0 if correcto else 1)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Tiempo de arranque de la aplicación: importación y primera pintura en frío.
+
+Cada repetición corre en un proceso de Python nuevo, como un contenedor recién
+levantado (sin cachés de Streamlit ni módulos ya importados):
+
+- ``importacion``: segundos de ``import Interfaz_Final``;
+- ``primera_pintura``: segundos hasta terminar la primera ejecución del script
+  con ``AppTest``, es decir, lo que tarda en aparecer la página inicial (sin
+  contar la importación de Streamlit y pandas, que ``AppTest`` ya hizo).
+
+También registra cuáles módulos pesados (scikit-learn, openpyxl, plotly, PIL,
+joblib) quedaron cargados en cada punto.
+
+Uso (desde la raíz del repositorio; el modelo y ``img/`` se buscan en --directorio):
+    python -m benchmarks.arranque --repeticiones 5 --salida arranque.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# pyarrow en sí llega con pandas (2.x lo importa al iniciar); lo que se puede diferir son sus lectores
+MODULOS_PESADOS = ['sklearn', 'openpyxl', 'plotly', 'PIL', 'joblib', 'pyarrow.parquet', 'scipy']
+
+_MEDICION = """
+import json, os, sys, time
+sys.path.insert(0, {raiz!r})
+os.chdir({directorio!r})
+pesados = {pesados!r}
+cargados = lambda: [m for m in pesados if m in sys.modules]
+inicio = time.perf_counter()
+if {etapa!r} == 'importacion':
+    import Interfaz_Final
+else:
+    from streamlit.testing.v1 import AppTest
+    base = time.perf_counter()
+    AppTest.from_file(os.path.join({raiz!r}, 'Interfaz_Final.py'), default_timeout=120).run()
+    inicio = base
+print(json.dumps({{'segundos': time.perf_counter() - inicio, 'modulos': cargados()}}))
+"""
+
+def medir(etapa, raiz, directorio):
+    codigo = _MEDICION.format(raiz=raiz, directorio=directorio, pesados=MODULOS_PESADOS, etapa=etapa)
+    salida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, check=True)
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+def main(argv=None):
+    raiz_repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Tiempo de importación y primera pintura en frío")
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--raiz', default=raiz_repo, help="Directorio con Interfaz_Final.py")
+    parser.add_argument('--directorio', default=raiz_repo,
+                        help="Directorio de trabajo de la aplicación (modelo_BLAA.pkl, img/)")
+    parser.add_argument('--salida', default=None, help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    resultados = {}
+    for etapa in ('importacion', 'primera_pintura'):
+        mediciones = [medir(etapa, args.raiz, args.directorio) for _ in range(args.repeticiones)]
+        tiempos = [m['segundos'] for m in mediciones]
+        resultados[etapa] = {
+            'segundos_min': min(tiempos),
+            'segundos_mediana': statistics.median(tiempos),
+            'modulos_pesados': mediciones[-1]['modulos']
+        }
+        print(f"{etapa:<16} min {min(tiempos):.3f} s  mediana {statistics.median(tiempos):.3f} s  "
+              f"módulos: {', '.join(mediciones[-1]['modulos']) or '-'}")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump({'python': sys.version.split()[0], 'resultados': resultados}, archivo, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
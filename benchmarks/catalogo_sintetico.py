@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Generador de catálogos sintéticos con cardinalidades realistas.
+
+Categoria tiene pocas decenas de valores; Author y Publisher crecen con el
+tamaño del catálogo y siguen una distribución tipo Zipf (pocos autores y
+editoriales concentran muchos títulos, con una cola larga de valores únicos).
+Los encabezados imitan los de los archivos reales para ejercitar también la
+corrección de nombres de columnas.
+"""
+
+import numpy as np
+import pandas as pd
+
+encabezados_reales = {
+    'Categoria': 'ÁREA TEMÁTICA',
+    'Author': 'AUTOR',
+    'Publisher': 'Editorial'
+}
+
+def _zipf(rng, n_valores, filas, exponente=1.1):
+    pesos = 1.0 / np.arange(1, n_valores + 1) ** exponente
+    return rng.choice(n_valores, size=filas, p=pesos / pesos.sum())
+
+def cardinalidades(filas):
+    """(categorías, autores, editoriales) esperados para un catálogo de ``filas`` filas"""
+    return 60, int(min(250_000, max(50, filas // 4))), int(min(25_000, max(20, filas // 40)))
+
+def generar_catalogo(filas, semilla=0, encabezados_originales=True):
+    """DataFrame con ID, Título y las tres columnas del modelo"""
+    rng = np.random.default_rng(semilla)
+    n_categorias, n_autores, n_editoriales = cardinalidades(filas)
+    categorias = np.array([f"Categoría {i}" for i in range(n_categorias)], dtype=object)
+    autores = np.array([f"Autor {i:06d}, Nombre" for i in range(n_autores)], dtype=object)
+    editoriales = np.array([f"Editorial {i:05d}" for i in range(n_editoriales)], dtype=object)
+    df = pd.DataFrame({
+        'ID': np.arange(filas),
+        'Titulo': [f"Título {i}" for i in range(filas)],
+        'Categoria': categorias[_zipf(rng, n_categorias, filas, 0.8)],
+        'Author': autores[_zipf(rng, n_autores, filas)],
+        'Publisher': editoriales[_zipf(rng, n_editoriales, filas)]
+    })
+    if encabezados_originales:
+        df = df.rename(columns=encabezados_reales)
+    return df
+
+def entrenar_modelo_sustituto(filas=50_000, semilla=0):
+    """Pipeline OneHotEncoder + LogisticRegression con la misma forma que modelo_BLAA.pkl,
+    para medir cuando el modelo real no está disponible"""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder
+
+    from utilidades_modelo import columnas_modelo
+
+    df = generar_catalogo(filas, semilla, encabezados_originales=False)
+    rng = np.random.default_rng(semilla + 1)
+    y = rng.random(filas) < 0.2
+    modelo = Pipeline([
+        ('preprocesador', ColumnTransformer([
+            ('codificador', OneHotEncoder(handle_unknown='ignore'), columnas_modelo)
+        ])),
+        ('clasificador', LogisticRegression(max_iter=200))
+    ])
+    return modelo.fit(df[columnas_modelo], y)
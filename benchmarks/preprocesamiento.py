@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Memoria pico y tiempo del preprocesamiento, antes y después de usar ``category``.
+
+"Antes" reproduce la ruta anterior: ``df.copy()`` en el preprocesamiento y otra
+copia al construir ``result_df``, con columnas de texto (object).
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.preprocesamiento --filas 1000000
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+
+from benchmarks.catalogo_sintetico import generar_catalogo
+from preprocesamiento import preprocess_dataframe
+
+def _ruta_anterior(df):
+    df_processed = df.copy()
+    result_df = df_processed.copy()
+    result_df['Probabilidad'] = 0.0
+    return result_df
+
+def _ruta_nueva(df):
+    result_df = preprocess_dataframe(df)
+    result_df['Probabilidad'] = 0.0
+    return result_df
+
+def medir(funcion, df):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcion(df)
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'segundos': segundos,
+        'pico_mb': pico / 1e6,
+        'resultado_mb': resultado.memory_usage(index=True, deep=True).sum() / 1e6
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara el preprocesamiento anterior y el actual")
+    parser.add_argument('--filas', type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    df = generar_catalogo(args.filas, encabezados_originales=False)
+    print(f"Entrada: {args.filas:,} filas, {df.memory_usage(index=True, deep=True).sum() / 1e6:,.1f} MB")
+    for nombre, funcion in (('antes', _ruta_anterior), ('después', _ruta_nueva)):
+        r = medir(funcion, df)
+        print(f"{nombre:>8}: {r['segundos']:.3f} s, pico {r['pico_mb']:,.1f} MB, "
+              f"resultado {r['resultado_mb']:,.1f} MB")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
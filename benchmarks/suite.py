@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Suite de rendimiento de la ruta de puntuación.
+
+Para cada tamaño de catálogo sintético mide: ingesta (CSV, XLSX, Parquet con
+``pd.read_parquet`` y con la lectura proyectada de ``formatos.leer_columnar``),
+corrección de columnas, preprocesamiento, ``predict_proba``, predicción por
+combinaciones únicas, estadísticas y exportación (CSV.gz y Parquet). Escribe
+los resultados en JSON y, con ``--comparar``, muestra la razón frente a una
+ejecución anterior.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.suite --filas 1000 100000 1000000 --salida bench.json
+    python -m benchmarks.suite --filas 1000 100000 --comparar bench.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from benchmarks.catalogo_sintetico import entrenar_modelo_sustituto, generar_catalogo
+from cache_predicciones import predecir_unicos
+from estadisticas import AcumuladorEstadisticas
+from exportacion import exportar
+from formatos import leer_columnar
+from preprocesamiento import preprocess_dataframe, vocabulario_modelo
+from resolucion_columnas import normalizar_columnas, resolvedor
+from utilidades_modelo import RUTA_MODELO, cargar_modelo
+
+MAX_FILAS_XLSX = 100_000
+
+def cronometrar(funcion, repeticiones):
+    """(segundos por repetición, último resultado)"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos, resultado
+
+def medir_tamano(filas, modelo, vocabulario, directorio, repeticiones, max_filas_xlsx):
+    catalogo = generar_catalogo(filas)
+    ruta_csv = os.path.join(directorio, f"catalogo_{filas}.csv")
+    ruta_parquet = os.path.join(directorio, f"catalogo_{filas}.parquet")
+    catalogo.to_csv(ruta_csv, index=False)
+    catalogo.to_parquet(ruta_parquet, index=False)
+    etapas = {}
+
+    etapas['ingesta_csv'], df = cronometrar(lambda: pd.read_csv(ruta_csv), repeticiones)
+    if filas <= max_filas_xlsx:
+        ruta_xlsx = os.path.join(directorio, f"catalogo_{filas}.xlsx")
+        catalogo.to_excel(ruta_xlsx, index=False)
+        etapas['ingesta_xlsx'], _ = cronometrar(lambda: pd.read_excel(ruta_xlsx), repeticiones)
+    etapas['ingesta_parquet'], _ = cronometrar(lambda: pd.read_parquet(ruta_parquet), repeticiones)
+    # La ruta que usan la aplicación y los scripts: solo columnas necesarias, como diccionario
+    etapas['ingesta_parquet_columnar'], _ = cronometrar(
+        lambda: leer_columnar(ruta_parquet, 'parquet'), repeticiones
+    )
+
+    def corregir():
+        # Sin la memoria por firma de encabezados, para medir la resolución completa
+        resolvedor.resolver.cache_clear()
+        return normalizar_columnas(df.copy(deep=False))[0]
+
+    etapas['correccion_columnas'], df = cronometrar(corregir, repeticiones)
+    etapas['preprocesamiento'], df_processed = cronometrar(
+        lambda: preprocess_dataframe(df, vocabulario), repeticiones
+    )
+    etapas['predict_proba'], probabilidades = cronometrar(
+        lambda: modelo.predict_proba(df_processed)[:, 1], repeticiones
+    )
+    etapas['prediccion_unicos'], _ = cronometrar(
+        lambda: predecir_unicos(modelo, df_processed), repeticiones
+    )
+    etapas['estadisticas'], _ = cronometrar(
+        lambda: AcumuladorEstadisticas.desde(probabilidades), repeticiones
+    )
+    result_df = df_processed.assign(Probabilidad=probabilidades.round(5))
+    for extension in ('csv.gz', 'parquet'):
+        ruta = os.path.join(directorio, f"resultado_{filas}.{extension}")
+        etapas[f"exportacion_{extension.replace('.', '_')}"], _ = cronometrar(
+            lambda: exportar(result_df, ruta), repeticiones
+        )
+
+    return [{
+        'filas': filas,
+        'etapa': etapa,
+        'segundos_min': min(tiempos),
+        'segundos_mediana': statistics.median(tiempos),
+        'filas_por_segundo': filas / min(tiempos) if min(tiempos) else None
+    } for etapa, tiempos in etapas.items()]
+
+def metadatos(origen_modelo):
+    return {
+        'fecha': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'procesador': platform.processor(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'modelo': origen_modelo
+    }
+
+def comparar(actual, anterior):
+    """Imprime la razón de tiempos (actual / anterior) por tamaño y etapa"""
+    base = {(r['filas'], r['etapa']): r['segundos_min'] for r in anterior['resultados']}
+    print(f"{'filas':>10} {'etapa':<24} {'anterior':>10} {'actual':>10} {'razón':>7}")
+    for r in actual['resultados']:
+        previo = base.get((r['filas'], r['etapa']))
+        if previo:
+            razon = r['segundos_min'] / previo
+            marca = '  ⚠️' if razon > 1.2 else ''
+            print(f"{r['filas']:>10} {r['etapa']:<24} {previo:>10.4f} {r['segundos_min']:>10.4f} "
+                  f"{razon:>7.2f}{marca}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suite de rendimiento de la ruta de puntuación")
+    parser.add_argument('--filas', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--max-filas-xlsx', type=int, default=MAX_FILAS_XLSX,
+                        help="Tamaño máximo para medir la ingesta XLSX (escribirlo es lento)")
+    parser.add_argument('--modelo', default=RUTA_MODELO,
+                        help="Modelo a medir; si no existe se entrena un sustituto sintético")
+    parser.add_argument('--salida', default=None, help="Archivo JSON de resultados")
+    parser.add_argument('--comparar', default=None, help="JSON de una ejecución anterior")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.modelo):
+        modelo, origen = cargar_modelo(args.modelo), args.modelo
+    else:
+        modelo, origen = entrenar_modelo_sustituto(), 'sustituto_sintetico'
+    vocabulario = vocabulario_modelo(modelo)
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as directorio:
+        for filas in args.filas:
+            print(f"Midiendo {filas:,} filas...", file=sys.stderr)
+            resultados.extend(medir_tamano(
+                filas, modelo, vocabulario, directorio, args.repeticiones, args.max_filas_xlsx
+            ))
+    informe = {
+        'metadatos': metadatos(origen),
+        'pico_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'resultados': resultados
+    }
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(informe, archivo, ensure_ascii=False, indent=2)
+    else:
+        json.dump(informe, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as archivo:
+            comparar(informe, json.load(archivo))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
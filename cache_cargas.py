@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Caché de archivos cargados, indexada por el hash de su contenido.
+
+Cada archivo se lee y se normaliza una sola vez; se conservan solo las
+columnas del modelo y, si existe, una columna identificadora. Las entradas se
+desalojan por orden de uso cuando el total de memoria supera el presupuesto.
+Un archivo que por sí solo supera el presupuesto no se guarda; la aplicación
+conserva de todos modos el DataFrame de la carga actual de cada sesión.
+"""
+
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from formatos import formato_archivo, leer_columnar
+from resolucion_columnas import es_columna_id, normalizar_columnas
+from utilidades_modelo import columnas_modelo
+
+PRESUPUESTO_BYTES = 512 * 1024 ** 2
+
+def huella_contenido(datos):
+    return hashlib.blake2b(datos, digest_size=20).hexdigest()
+
+def columna_id(df):
+    """Primera columna cuyo nombre parece un identificador, o None"""
+    return next((col for col in df.columns if es_columna_id(col)), None)
+
+def leer_carga(nombre, datos):
+    """Lee un archivo subido, normaliza columnas y conserva solo las necesarias"""
+    formato = formato_archivo(nombre)
+    if formato in ('parquet', 'feather'):
+        # La lectura columnar ya proyecta solo las columnas necesarias
+        return leer_columnar(datos, formato)
+    if formato == 'csv':
+        df = pd.read_csv(io.BytesIO(datos))
+    else:
+        df = pd.read_excel(io.BytesIO(datos))
+    df, corregidas = normalizar_columnas(df)
+    id_col = columna_id(df)
+    columnas = ([id_col] if id_col else []) + [col for col in columnas_modelo if col in df.columns]
+    return df[columnas], corregidas
+
+class CacheCargas:
+    """Caché LRU de DataFrames ya normalizados con presupuesto total de memoria"""
+
+    def __init__(self, presupuesto_bytes=PRESUPUESTO_BYTES):
+        self.presupuesto_bytes = presupuesto_bytes
+        self.bytes_usados = 0
+        self._datos = OrderedDict()
+        self._candado = threading.Lock()
+
+    def obtener(self, clave):
+        with self._candado:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            self._datos.move_to_end(clave)
+            return entrada[0], entrada[1]
+
+    def guardar(self, clave, df, corregidas):
+        tamano = int(df.memory_usage(index=True, deep=True).sum())
+        if tamano > self.presupuesto_bytes:
+            return
+        with self._candado:
+            if clave in self._datos:
+                self.bytes_usados -= self._datos.pop(clave)[2]
+            while self._datos and self.bytes_usados + tamano > self.presupuesto_bytes:
+                self.bytes_usados -= self._datos.popitem(last=False)[1][2]
+            self._datos[clave] = (df, corregidas, tamano)
+            self.bytes_usados += tamano
+
+    def obtener_o_leer(self, nombre, datos, clave=None):
+        """Devuelve (df, corregidas) desde la caché o leyendo el archivo si no está"""
+        clave = clave or huella_contenido(datos)
+        entrada = self.obtener(clave)
+        if entrada is None:
+            entrada = leer_carga(nombre, datos)
+            self.guardar(clave, *entrada)
+        return entrada
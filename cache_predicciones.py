@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Puntuación por combinaciones únicas y caché de predicciones.
+
+Los catálogos repiten muchas veces la misma combinación (Categoria, Author,
+Publisher). ``predecir_unicos`` predice solo las combinaciones distintas y
+reparte los resultados a todas las filas. Antes de llamar al modelo consulta
+los niveles de caché recibidos (p. ej. ``CacheLRU``), en orden.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utilidades_modelo import columnas_modelo
+
+CAPACIDAD_CACHE = 200_000
+BYTES_POR_ENTRADA = 120
+
+def codificar_triples(df, columnas=columnas_modelo):
+    """Devuelve el código de combinación de cada fila y la posición de la primera aparición de cada una"""
+    codigos = np.zeros(len(df), dtype=np.int64)
+    for col in columnas:
+        codigos_col, unicos_col = pd.factorize(df[col], use_na_sentinel=False)
+        codigos = codigos * len(unicos_col) + codigos_col
+    codigos, unicos = pd.factorize(codigos)
+    _, primeras = np.unique(codigos, return_index=True)
+    return codigos, primeras
+
+def claves_triples(df, columnas=columnas_modelo):
+    """Claves hashables por fila; los valores faltantes se representan como None"""
+    valores = df[columnas].astype(object)
+    valores = valores.where(valores.notna(), None)
+    return list(valores.itertuples(index=False, name=None))
+
+class CacheLRU:
+    """Caché LRU acotada de probabilidades por combinación, segura entre hilos"""
+
+    def __init__(self, capacidad=CAPACIDAD_CACHE):
+        self.capacidad = capacidad
+        self._datos = OrderedDict()
+        self._candado = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener_muchos(self, claves):
+        """Probabilidades de las claves; NaN donde no están en caché"""
+        valores = np.full(len(claves), np.nan)
+        with self._candado:
+            for i, clave in enumerate(claves):
+                valor = self._datos.get(clave)
+                if valor is not None:
+                    self._datos.move_to_end(clave)
+                    valores[i] = valor
+            encontrados = int(np.count_nonzero(~np.isnan(valores)))
+            self.aciertos += encontrados
+            self.fallos += len(claves) - encontrados
+        return valores
+
+    def guardar_muchos(self, claves, valores):
+        with self._candado:
+            for clave, valor in zip(claves, valores):
+                self._datos[clave] = float(valor)
+                self._datos.move_to_end(clave)
+            while len(self._datos) > self.capacidad:
+                self._datos.popitem(last=False)
+
+    def tamano_bytes(self):
+        """Memoria aproximada: nodo del OrderedDict y valor por entrada (las cadenas de la clave suelen ser las del DataFrame)"""
+        return len(self._datos) * BYTES_POR_ENTRADA
+
+    def estadisticas(self):
+        with self._candado:
+            consultas = self.aciertos + self.fallos
+            return {
+                'entradas': len(self._datos),
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': self.aciertos / consultas if consultas else 0.0
+            }
+
+    def limpiar(self):
+        with self._candado:
+            self._datos.clear()
+            self.aciertos = 0
+            self.fallos = 0
+
+def predecir_unicos(modelo, df, niveles=()):
+    """Probabilidades por fila calculando el modelo solo para combinaciones únicas no cacheadas"""
+    codigos, primeras = codificar_triples(df)
+    unicos = df.iloc[primeras]
+    claves = claves_triples(unicos)
+    probabilidades = np.full(len(unicos), np.nan)
+
+    # Cada nivel se consulta solo por lo que los niveles anteriores no tenían
+    pendientes_por_nivel = []
+    pendientes = np.arange(len(unicos))
+    for nivel in niveles:
+        if not pendientes.size:
+            break
+        pendientes_por_nivel.append((nivel, pendientes))
+        valores = nivel.obtener_muchos([claves[i] for i in pendientes])
+        encontrados = ~np.isnan(valores)
+        probabilidades[pendientes[encontrados]] = valores[encontrados]
+        pendientes = pendientes[~encontrados]
+
+    if pendientes.size:
+        probabilidades[pendientes] = modelo.predict_proba(unicos.iloc[pendientes])[:, 1]
+
+    # Completar cada nivel con lo que se encontró más abajo o se calculó
+    for nivel, consultados in pendientes_por_nivel:
+        nivel.guardar_muchos([claves[i] for i in consultados], probabilidades[consultados])
+
+    return probabilidades[codigos]
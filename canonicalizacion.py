@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Canonicalización de autores, editoriales y categorías contra las grafías del modelo.
+
+``IndiceCanonico`` indexa una vez las categorías que el modelo conoce para una
+columna y lleva cada valor nuevo a una de ellas, en este orden:
+
+1. coincidencia exacta;
+2. la misma grafía salvo mayúsculas y minúsculas;
+3. la misma clave canónica: sin tildes, sin mayúsculas, sin puntuación, sin
+   palabras vacías de la columna (p. ej. "Ed.", "S.A.") y con las palabras
+   ordenadas, de modo que "García Márquez, Gabriel" y "Gabriel Garcia Marquez"
+   coinciden;
+4. la clave más parecida entre las que comparten más trigramas con la del
+   valor, si la similitud supera el corte y los números coinciden
+   ("Tomo 2" no se confunde con "Tomo 3").
+
+Si nada aplica, el valor queda igual (el modelo lo tratará como desconocido).
+Se aplica sobre valores únicos y el resultado se memoriza, así que un
+catálogo de millones de filas se reduce a unos miles de búsquedas.
+"""
+
+import difflib
+import itertools
+import re
+import sys
+from collections import Counter
+from functools import lru_cache
+
+from resolucion_columnas import trigramas
+from utilidades_modelo import plegar_texto
+
+CORTE_SIMILITUD = 0.9
+MAX_CANDIDATOS = 20
+CAPACIDAD_MEMORIA = 200_000
+BYTES_POR_RESUELTO = 200
+
+# Palabras que no distinguen un valor de otro dentro de cada columna
+palabras_vacias = {
+    'Publisher': {'ed', 'edit', 'editorial', 'editoriales', 'ediciones', 'editores', 'editora',
+                  'sa', 'sas', 'ltda', 'sl', 'inc', 'ltd'},
+    'Author': set(),
+    'Categoria': set()
+}
+
+_separadores = re.compile(r'[^\w]+')
+
+def _numeros(clave):
+    return frozenset(re.findall(r'\d+', clave))
+
+class IndiceCanonico:
+    """Grafías conocidas de una columna, indexadas por clave canónica y por trigramas"""
+
+    def __init__(self, conocidas, vacias=(), corte=CORTE_SIMILITUD):
+        self.vacias = set(vacias)
+        self.corte = corte
+        self.conocidas = set()
+        self._pliegues = {}
+        self._claves = {}
+        for valor in conocidas:
+            if not isinstance(valor, str):
+                continue
+            self.conocidas.add(valor)
+            self._pliegues.setdefault(valor.casefold(), valor)
+            # Si dos grafías conocidas comparten clave se elige siempre la más corta (p. ej.
+            # "Planeta" antes que "Editorial Planeta"), para que el resultado no dependa del orden
+            clave = self.clave(valor)
+            actual = self._claves.get(clave)
+            if actual is None or (len(valor), valor) < (len(actual), actual):
+                self._claves[clave] = valor
+        self._trigramas = {}
+        self._por_numeros = {}
+        for clave in self._claves:
+            if clave:
+                for trigrama in trigramas(clave):
+                    self._trigramas.setdefault(trigrama, []).append(clave)
+                self._por_numeros.setdefault(_numeros(clave), []).append(clave)
+        self.resolver = lru_cache(maxsize=CAPACIDAD_MEMORIA)(self._resolver)
+        self._tamano = self._medir()
+
+    def _medir(self):
+        # Las grafías y claves dominan; cada trigrama cuenta su cadena y su lista de claves
+        cadenas = itertools.chain(self.conocidas, self._pliegues, self._claves, self._trigramas)
+        listas = itertools.chain(self._trigramas.values(), self._por_numeros.values())
+        contenedores = (self.conocidas, self._pliegues, self._claves, self._trigramas, self._por_numeros)
+        return sum(map(sys.getsizeof, itertools.chain(cadenas, listas, contenedores)))
+
+    def tamano_bytes(self):
+        """Memoria aproximada del índice y de los valores ya resueltos"""
+        return self._tamano + self.resolver.cache_info().currsize * BYTES_POR_RESUELTO
+
+    def clave(self, texto):
+        """Texto plegado, sin puntuación ni palabras vacías, con las palabras ordenadas"""
+        palabras = []
+        for palabra in _separadores.sub(' ', plegar_texto(texto).replace('_', ' ')).split():
+            # Las siglas con puntos ("S.A.", "J.R.R.") quedan como una sola palabra
+            if len(palabra) == 1 and palabras and palabras[-1][1]:
+                palabras[-1] = (palabras[-1][0] + palabra, True)
+            else:
+                palabras.append((palabra, len(palabra) == 1))
+        return ' '.join(sorted(palabra for palabra, _ in palabras if palabra not in self.vacias))
+
+    def _candidatas(self, clave):
+        """Claves conocidas con los mismos números, priorizando las que comparten más trigramas"""
+        numeros = _numeros(clave)
+        grupo = self._por_numeros.get(numeros, ())
+        if len(grupo) <= MAX_CANDIDATOS:
+            return grupo
+        coincidencias = Counter()
+        for trigrama in trigramas(clave):
+            coincidencias.update(self._trigramas.get(trigrama, ()))
+        candidatas = (candidata for candidata, _ in coincidencias.most_common() if _numeros(candidata) == numeros)
+        return list(itertools.islice(candidatas, MAX_CANDIDATOS))
+
+    def _parecida(self, clave):
+        """Grafía conocida cuya clave es la más similar a ``clave``, o None"""
+        mejor, puntaje = None, self.corte
+        for candidata in self._candidatas(clave):
+            similitud = difflib.SequenceMatcher(None, clave, candidata).ratio()
+            if similitud >= puntaje:
+                mejor, puntaje = candidata, similitud
+        return self._claves[mejor] if mejor is not None else None
+
+    def _resolver(self, valor):
+        if valor in self.conocidas:
+            return valor
+        pliegue = self._pliegues.get(valor.casefold())
+        if pliegue is not None:
+            return pliegue
+        clave = self.clave(valor)
+        if not clave:
+            return valor
+        if clave in self._claves:
+            return self._claves[clave]
+        return self._parecida(clave) or valor
+
+    def canonizar(self, valores):
+        """Resuelve una lista de valores (normalmente los únicos de una columna); los no textuales quedan igual"""
+        return [self.resolver(valor) if isinstance(valor, str) else valor for valor in valores]
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Cola de puntuación compartida entre sesiones de la aplicación.
+
+En lugar de que cada sesión de Streamlit ejecute ``predict_proba`` en su propio
+hilo, los trabajos se envían a una ``ColaPuntuacion`` única por proceso con un
+número fijo de hilos trabajadores. Cada trabajo se divide en fragmentos de
+filas y los trabajadores toman fragmentos por turnos entre sesiones, así que
+un catálogo de un millón de filas no bloquea a quien sube cincuenta. La cola
+limita los trabajos activos en total y por sesión (``ColaLlena``), y cada
+trabajo expone su progreso para mostrarlo en la sesión que lo envió.
+"""
+
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+
+FILAS_POR_FRAGMENTO = 20_000
+# Los trabajadores son hilos del mismo proceso que Streamlit y compiten por el GIL con los scripts de
+# todas las sesiones: pocos bastan, y el paralelismo de CPU real lo da el motor de procesos
+HILOS = int(os.environ.get('BLAA_HILOS_PUNTUACION', 2))
+MAX_TRABAJOS = 32
+MAX_POR_SESION = 1
+
+_ids = itertools.count(1)
+
+class ColaLlena(Exception):
+    """La cola no admite más trabajos por ahora, en total o para la sesión"""
+
+class TrabajoPuntuacion:
+    """Un DataFrame a puntuar por fragmentos; acumula las probabilidades y el progreso"""
+
+    def __init__(self, sesion, df, puntuar, filas_por_fragmento):
+        self.id = next(_ids)
+        self.sesion = sesion
+        self.df = df
+        self.puntuar = puntuar
+        limites = list(range(0, len(df), filas_por_fragmento)) + [len(df)]
+        self._pendientes = deque(zip(limites[:-1], limites[1:]))
+        self._en_curso = 0
+        self.probabilidades = np.full(len(df), np.nan)
+        self.filas_hechas = 0
+        self.estado = 'en_cola'
+        self.cancelado = False
+        self.error = None
+        self.creado = time.monotonic()
+        self.inicio = None
+        self.fin = None
+        self._terminado = threading.Event()
+
+    @property
+    def total(self):
+        return len(self.df)
+
+    @property
+    def progreso(self):
+        return self.filas_hechas / self.total if self.total else 1.0
+
+    @property
+    def terminado(self):
+        return self._terminado.is_set()
+
+    def esperar(self, tiempo=None):
+        """True si el trabajo terminó (bien, con error o cancelado) dentro del tiempo dado"""
+        return self._terminado.wait(tiempo)
+
+    @property
+    def filas_por_segundo(self):
+        if self.inicio is None:
+            return 0.0
+        transcurrido = (self.fin or time.monotonic()) - self.inicio
+        return self.filas_hechas / transcurrido if transcurrido > 0 else 0.0
+
+    @property
+    def eta_segundos(self):
+        """Segundos estimados para terminar según el ritmo actual; None si aún no hay ritmo"""
+        ritmo = self.filas_por_segundo
+        return (self.total - self.filas_hechas) / ritmo if ritmo else None
+
+    def descripcion(self):
+        if self.estado == 'en_cola':
+            return "⏳ En cola, esperando un trabajador libre..."
+        texto = f"{self.filas_hechas:,} de {self.total:,} filas ({self.filas_por_segundo:,.0f} filas/s"
+        eta = self.eta_segundos
+        return texto + (f", faltan ~{eta:,.0f} s)" if eta is not None else ")")
+
+class ColaPuntuacion:
+    """Trabajadores compartidos con turnos por sesión y límite de trabajos activos"""
+
+    def __init__(self, hilos=HILOS, max_trabajos=MAX_TRABAJOS, max_por_sesion=MAX_POR_SESION):
+        self.hilos = max(1, hilos)
+        self.max_trabajos = max_trabajos
+        self.max_por_sesion = max_por_sesion
+        self._condicion = threading.Condition()
+        # Sesión -> trabajos activos; la sesión atendida pasa al final para repartir por turnos
+        self._sesiones = OrderedDict()
+        self._activos = 0
+        self._cerrada = False
+        self._trabajadores = [
+            threading.Thread(target=self._trabajar, name=f'puntuacion-{i}', daemon=True)
+            for i in range(self.hilos)
+        ]
+        for trabajador in self._trabajadores:
+            trabajador.start()
+
+    def enviar(self, sesion, df, puntuar, filas_por_fragmento=FILAS_POR_FRAGMENTO):
+        """Encola ``puntuar(fragmento) -> probabilidades`` sobre ``df``; lanza ``ColaLlena`` si no hay cupo"""
+        with self._condicion:
+            if self._cerrada:
+                raise RuntimeError("La cola de puntuación está cerrada")
+            if self._activos >= self.max_trabajos:
+                raise ColaLlena(f"Hay {self._activos} predicciones en curso; intenta de nuevo en unos segundos")
+            if len(self._sesiones.get(sesion, ())) >= self.max_por_sesion:
+                raise ColaLlena("Ya hay una predicción en curso para esta sesión")
+            trabajo = TrabajoPuntuacion(sesion, df, puntuar, filas_por_fragmento)
+            self._sesiones.setdefault(sesion, deque()).append(trabajo)
+            self._activos += 1
+            if not trabajo._pendientes:
+                self._finalizar(trabajo)
+            self._condicion.notify_all()
+        return trabajo
+
+    def cancelar(self, trabajo):
+        """Descarta los fragmentos pendientes; los que ya se están calculando terminan normalmente"""
+        with self._condicion:
+            if trabajo.terminado:
+                return
+            trabajo.cancelado = True
+            trabajo._pendientes.clear()
+            if not trabajo._en_curso:
+                self._finalizar(trabajo)
+
+    def estadisticas(self):
+        with self._condicion:
+            return {
+                'hilos': self.hilos,
+                'trabajos_activos': self._activos,
+                'sesiones_activas': len(self._sesiones),
+                'max_trabajos': self.max_trabajos
+            }
+
+    def cerrar(self):
+        with self._condicion:
+            self._cerrada = True
+            self._condicion.notify_all()
+        for trabajador in self._trabajadores:
+            trabajador.join()
+
+    def _siguiente(self):
+        """Siguiente fragmento (trabajo, inicio, fin) tomando las sesiones por turnos"""
+        for sesion in list(self._sesiones):
+            for trabajo in self._sesiones[sesion]:
+                if trabajo._pendientes:
+                    inicio, fin = trabajo._pendientes.popleft()
+                    trabajo._en_curso += 1
+                    if trabajo.inicio is None:
+                        trabajo.estado = 'en_curso'
+                        trabajo.inicio = time.monotonic()
+                    self._sesiones.move_to_end(sesion)
+                    return trabajo, inicio, fin
+        return None
+
+    def _finalizar(self, trabajo):
+        if trabajo.error is not None:
+            trabajo.estado = 'error'
+        elif trabajo.cancelado:
+            trabajo.estado = 'cancelado'
+        else:
+            trabajo.estado = 'terminado'
+        trabajo.fin = time.monotonic()
+        trabajos = self._sesiones[trabajo.sesion]
+        trabajos.remove(trabajo)
+        if not trabajos:
+            del self._sesiones[trabajo.sesion]
+        self._activos -= 1
+        trabajo._terminado.set()
+        self._condicion.notify_all()
+
+    def _trabajar(self):
+        while True:
+            with self._condicion:
+                tarea = self._siguiente()
+                while tarea is None and not self._cerrada:
+                    self._condicion.wait()
+                    tarea = self._siguiente()
+                if tarea is None:
+                    return
+            trabajo, inicio, fin = tarea
+            try:
+                valores, error = trabajo.puntuar(trabajo.df.iloc[inicio:fin]), None
+            except Exception as e:
+                valores, error = None, e
+            with self._condicion:
+                trabajo._en_curso -= 1
+                if error is not None:
+                    trabajo.error = error
+                    trabajo._pendientes.clear()
+                else:
+                    trabajo.probabilidades[inicio:fin] = valores
+                    trabajo.filas_hechas += fin - inicio
+                if not trabajo._pendientes and not trabajo._en_curso:
+                    self._finalizar(trabajo)
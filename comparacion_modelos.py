@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Comparación de varios modelos sobre el mismo catálogo en una sola pasada.
+
+El catálogo se lee y se preprocesa una sola vez (conversión a ``category`` y
+limpieza de espacios). Para cada modelo solo se ajustan las categorías a su
+vocabulario, lo que cuesta según el número de categorías y no de filas, y los
+modelos se puntúan en paralelo en hilos. El resultado tiene una columna de
+probabilidades por modelo, más estadísticas de acuerdo por pares: coincidencia
+de banda de demanda, correlación de rangos de Spearman y diferencia absoluta.
+
+Uso:
+    python comparacion_modelos.py catalogo.csv comparacion.csv
+    python comparacion_modelos.py catalogo.parquet comparacion.parquet --modelos "Modelo Regresión Logística" regresion_2025
+"""
+
+import argparse
+import itertools
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from cache_predicciones import CacheLRU, predecir_unicos
+from formatos import crear_escritor
+from preprocesamiento import preprocess_dataframe, vocabulario_modelo
+from utilidades_modelo import bandas_probabilidad, cargar_modelos
+
+def puntuar_modelos(modelos, df, vocabularios=None, niveles=None):
+    """Probabilidades por fila (una columna por modelo) de un DataFrame ya preprocesado
+
+    ``modelos`` es {nombre: modelo}; ``vocabularios`` y ``niveles`` (cachés por modelo) son
+    opcionales y se indexan por el mismo nombre.
+    """
+    vocabularios = vocabularios or {}
+    niveles = niveles or {}
+
+    def puntuar(nombre):
+        vocabulario = vocabularios.get(nombre)
+        datos = preprocess_dataframe(df, vocabulario) if vocabulario else df
+        return predecir_unicos(modelos[nombre], datos, niveles.get(nombre, ()))
+
+    with ThreadPoolExecutor(max_workers=max(1, len(modelos))) as ejecutor:
+        columnas = dict(zip(modelos, ejecutor.map(puntuar, modelos)))
+    return pd.DataFrame(columnas, index=df.index)
+
+def resumen_modelos(probabilidades):
+    """Promedio y filas por banda de demanda de cada modelo"""
+    filas = {}
+    for nombre in probabilidades.columns:
+        valores = probabilidades[nombre].to_numpy()
+        bandas = np.bincount(bandas_probabilidad(valores), minlength=3)
+        filas[nombre] = {
+            'Promedio': float(valores.mean()) if len(valores) else np.nan,
+            'Alta': int(bandas[2]),
+            'Media': int(bandas[1]),
+            'Baja': int(bandas[0])
+        }
+    return pd.DataFrame.from_dict(filas, orient='index')
+
+def estadisticas_comparacion(probabilidades):
+    """Acuerdo entre cada par de modelos: misma banda de demanda, Spearman y diferencias absolutas"""
+    bandas = {nombre: bandas_probabilidad(probabilidades[nombre].to_numpy()) for nombre in probabilidades}
+    spearman = probabilidades.corr(method='spearman')
+    filas = []
+    for a, b in itertools.combinations(probabilidades.columns, 2):
+        diferencias = np.abs(probabilidades[a].to_numpy() - probabilidades[b].to_numpy())
+        filas.append({
+            'Modelo A': a,
+            'Modelo B': b,
+            'Acuerdo de banda': float(np.mean(bandas[a] == bandas[b])) if len(diferencias) else np.nan,
+            'Spearman': float(spearman.loc[a, b]),
+            'Diferencia media': float(diferencias.mean()) if len(diferencias) else np.nan,
+            'Diferencia máxima': float(diferencias.max()) if len(diferencias) else np.nan
+        })
+    return pd.DataFrame(filas, columns=['Modelo A', 'Modelo B', 'Acuerdo de banda', 'Spearman',
+                                        'Diferencia media', 'Diferencia máxima'])
+
+def main(argv=None):
+    # Import diferido: puntuacion_lotes importa el motor paralelo y los escritores
+    from puntuacion_lotes import TAMANO_BLOQUE, leer_por_bloques
+
+    parser = argparse.ArgumentParser(description="Compara varios modelos sobre el mismo catálogo")
+    parser.add_argument('entrada', help="Catálogo en CSV, Excel (.xlsx), Parquet o Arrow/Feather")
+    parser.add_argument('salida', help="Archivo con una columna de probabilidad por modelo")
+    parser.add_argument('--modelos', nargs='+', default=None,
+                        help="Nombres de los modelos a comparar; por defecto todos los disponibles")
+    parser.add_argument('--tamano-bloque', type=int, default=TAMANO_BLOQUE,
+                        help=f"Filas por bloque (por defecto {TAMANO_BLOQUE})")
+    args = parser.parse_args(argv)
+
+    registro = cargar_modelos()
+    nombres = args.modelos or list(registro)
+    desconocidos = [nombre for nombre in nombres if nombre not in registro]
+    if desconocidos:
+        parser.error(f"Modelos desconocidos: {', '.join(desconocidos)}. Disponibles: {', '.join(registro)}")
+    if len(nombres) < 2:
+        parser.error("Se necesitan al menos dos modelos para comparar")
+
+    modelos = {nombre: registro[nombre] for nombre in nombres}
+    vocabularios = {nombre: vocabulario_modelo(modelo) for nombre, modelo in modelos.items()}
+    niveles = {nombre: [CacheLRU()] for nombre in nombres}
+    # Las probabilidades se conservan (8 bytes por fila y modelo) para el Spearman global
+    partes = []
+    escritor = crear_escritor(args.salida)
+    try:
+        for bloque in leer_por_bloques(args.entrada, args.tamano_bloque):
+            probabilidades = puntuar_modelos(modelos, preprocess_dataframe(bloque), vocabularios, niveles)
+            partes.append(probabilidades)
+            for nombre in nombres:
+                bloque[f'Probabilidad {nombre}'] = probabilidades[nombre].round(5)
+            escritor.escribir(bloque)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        escritor.cerrar()
+
+    probabilidades = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=nombres)
+    print(f"✅ {len(probabilidades)} filas comparadas en {args.salida}", file=sys.stderr)
+    with pd.option_context('display.width', 160, 'display.max_columns', None):
+        print(resumen_modelos(probabilidades).to_string(), file=sys.stderr)
+        print(estadisticas_comparacion(probabilidades).to_string(index=False), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Estadísticas de las probabilidades calculadas en una pasada y combinables.
+
+``AcumuladorEstadisticas`` mantiene los conteos del histograma (20 intervalos
+fijos en [0, 1]), los conteos por banda de demanda, el total, la suma, el
+mínimo y el máximo. Se alimenta bloque a bloque y dos acumuladores parciales
+(p. ej. de bloques o procesos distintos) se combinan con ``fusionar``. La
+gráfica se dibuja a partir de los conteos, así que su costo no depende del
+número de filas.
+"""
+
+import numpy as np
+
+from utilidades_modelo import bandas_probabilidad
+
+N_INTERVALOS = 20
+
+class AcumuladorEstadisticas:
+    """Histograma, bandas de demanda y resumen de probabilidades"""
+
+    def __init__(self, n_intervalos=N_INTERVALOS):
+        self.n_intervalos = n_intervalos
+        self.conteos = np.zeros(n_intervalos, dtype=np.int64)
+        self.bandas = np.zeros(3, dtype=np.int64)
+        self.total = 0
+        self.suma = 0.0
+        self.minimo = np.inf
+        self.maximo = -np.inf
+
+    @classmethod
+    def desde(cls, probabilidades, n_intervalos=N_INTERVALOS):
+        return cls(n_intervalos).agregar(probabilidades)
+
+    def agregar(self, probabilidades):
+        probabilidades = np.asarray(probabilidades, dtype=np.float64)
+        if not probabilidades.size:
+            return self
+        intervalos = np.minimum((probabilidades * self.n_intervalos).astype(np.intp), self.n_intervalos - 1)
+        self.conteos += np.bincount(intervalos, minlength=self.n_intervalos)
+        self.bandas += np.bincount(bandas_probabilidad(probabilidades), minlength=3)
+        self.total += probabilidades.size
+        self.suma += float(probabilidades.sum())
+        self.minimo = min(self.minimo, float(probabilidades.min()))
+        self.maximo = max(self.maximo, float(probabilidades.max()))
+        return self
+
+    def fusionar(self, otro):
+        if otro.n_intervalos != self.n_intervalos:
+            raise ValueError("No se pueden fusionar histogramas con distinto número de intervalos")
+        self.conteos += otro.conteos
+        self.bandas += otro.bandas
+        self.total += otro.total
+        self.suma += otro.suma
+        self.minimo = min(self.minimo, otro.minimo)
+        self.maximo = max(self.maximo, otro.maximo)
+        return self
+
+    @property
+    def promedio(self):
+        return self.suma / self.total if self.total else float('nan')
+
+    @property
+    def baja(self):
+        return int(self.bandas[0])
+
+    @property
+    def media(self):
+        return int(self.bandas[1])
+
+    @property
+    def alta(self):
+        return int(self.bandas[2])
+
+    def bordes(self):
+        return np.linspace(0.0, 1.0, self.n_intervalos + 1)
+
+def figura_histograma(estadisticas, titulo):
+    """Histograma de Plotly a partir de los conteos precalculados"""
+    import plotly.graph_objects as go
+
+    bordes = estadisticas.bordes()
+    fig = go.Figure(go.Bar(
+        x=(bordes[:-1] + bordes[1:]) / 2,
+        y=estadisticas.conteos,
+        width=np.diff(bordes),
+        marker_color='#1f77b4',
+        customdata=np.column_stack([bordes[:-1], bordes[1:]]),
+        hovertemplate='Probabilidad %{customdata[0]:.2f}–%{customdata[1]:.2f}<br>Frecuencia %{y}<extra></extra>'
+    ))
+    fig.update_layout(
+        title=titulo,
+        xaxis_title='Probabilidad',
+        yaxis_title='Frecuencia',
+        bargap=0,
+        showlegend=False,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Exportación de resultados por bloques.
+
+Los resultados se escriben bloque a bloque en un archivo temporal con los
+escritores incrementales de ``formatos`` (CSV comprimido, Parquet o Excel),
+de modo que nunca se construye el archivo completo como texto en memoria.
+Solo se conservan los bytes finales, ya comprimidos, para la descarga.
+"""
+
+import os
+import tempfile
+
+from formatos import crear_escritor
+
+FILAS_POR_BLOQUE = 50_000
+
+# Nombre visible: (extensión, tipo MIME)
+formatos_exportacion = {
+    'CSV comprimido (.csv.gz)': ('csv.gz', 'application/gzip'),
+    'Parquet (.parquet)': ('parquet', 'application/vnd.apache.parquet'),
+    'Excel (.xlsx)': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'CSV (.csv)': ('csv', 'text/csv')
+}
+
+def exportar(df, ruta, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Escribe ``df`` en ``ruta`` por bloques; el formato sale de la extensión"""
+    escritor = crear_escritor(ruta)
+    try:
+        for inicio in range(0, len(df), filas_por_bloque):
+            escritor.escribir(df.iloc[inicio:inicio + filas_por_bloque])
+    finally:
+        escritor.cerrar()
+    return ruta
+
+def exportar_bytes(df, extension, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Exporta a un archivo temporal y devuelve su contenido (ya comprimido según el formato)"""
+    descriptor, ruta = tempfile.mkstemp(suffix=f".{extension}")
+    os.close(descriptor)
+    try:
+        exportar(df, ruta, filas_por_bloque)
+        with open(ruta, 'rb') as archivo:
+            return archivo.read()
+    finally:
+        os.remove(ruta)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Lectura y escritura de formatos columnares (Parquet y Arrow IPC/Feather).
+
+Al leer se consulta primero el esquema, se resuelven los nombres de columnas
+y se cargan solo las columnas del modelo (más la identificadora, si existe)
+como columnas codificadas por diccionario, que pandas recibe como
+``category``. También se definen los escritores incrementales que usa la
+puntuación por lotes para cada formato de salida.
+
+pyarrow se importa dentro de cada función, como openpyxl en ``EscritorExcel``:
+importar la aplicación o leer un CSV no lo carga.
+"""
+
+import gzip
+import os
+
+from resolucion_columnas import es_columna_id, resolvedor
+from utilidades_modelo import columnas_modelo
+
+formatos_columnares = {
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.feather': 'feather',
+    '.arrow': 'feather',
+    '.ipc': 'feather'
+}
+
+def formato_archivo(nombre):
+    """'csv', 'xlsx', 'parquet' o 'feather' según la extensión del archivo"""
+    extension = os.path.splitext(str(nombre).lower())[1]
+    if extension in formatos_columnares:
+        return formatos_columnares[extension]
+    return 'xlsx' if extension == '.xlsx' else 'csv'
+
+def _fuente(fuente):
+    """Acepta rutas o bytes (p. ej. archivos subidos a Streamlit)"""
+    import pyarrow as pa
+
+    if isinstance(fuente, (bytes, bytearray, memoryview)):
+        return pa.BufferReader(fuente)
+    return fuente
+
+def _esquema(fuente, formato):
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+
+    if formato == 'parquet':
+        return pq.read_schema(fuente)
+    with ipc.open_file(fuente) as lector:
+        return lector.schema
+
+def _proyeccion(nombres):
+    """Columnas a leer, su nombre resuelto y las que se renombraron"""
+    resueltos, corregidas = resolvedor.resolver(tuple(nombres))
+    seleccion = {
+        original: resuelto for original, resuelto in zip(nombres, resueltos)
+        if resuelto in columnas_modelo
+    }
+    id_col = next((i for i, resuelto in enumerate(resueltos) if es_columna_id(resuelto)), None)
+    if id_col is not None:
+        seleccion = {nombres[id_col]: resueltos[id_col], **seleccion}
+    return seleccion, list(corregidas)
+
+def _a_pandas(tabla, seleccion):
+    import pyarrow as pa
+
+    columnas = []
+    for nombre in tabla.column_names:
+        columna = tabla.column(nombre)
+        if seleccion[nombre] in columnas_modelo and not pa.types.is_dictionary(columna.type):
+            columna = columna.dictionary_encode()
+        columnas.append(columna)
+    df = pa.table(columnas, names=tabla.column_names).to_pandas()
+    df.columns = [seleccion[nombre] for nombre in tabla.column_names]
+    return df
+
+def leer_columnar(fuente, formato):
+    """Lee solo las columnas necesarias de un Parquet/Feather; devuelve (df, corregidas)"""
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    seleccion, corregidas = _proyeccion(_esquema(_fuente(fuente), formato).names)
+    columnas = list(seleccion)
+    if formato == 'parquet':
+        diccionario = [col for col in columnas if seleccion[col] in columnas_modelo]
+        tabla = pq.read_table(_fuente(fuente), columns=columnas, read_dictionary=diccionario)
+    else:
+        tabla = feather.read_table(_fuente(fuente), columns=columnas)
+    return _a_pandas(tabla, seleccion), corregidas
+
+def iterar_columnar(ruta, formato, tamano_bloque):
+    """Genera bloques de hasta ``tamano_bloque`` filas con las columnas proyectadas"""
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+
+    seleccion, _ = _proyeccion(_esquema(ruta, formato).names)
+    columnas = list(seleccion)
+    if formato == 'parquet':
+        archivo = pq.ParquetFile(ruta)
+        for lote in archivo.iter_batches(batch_size=tamano_bloque, columns=columnas):
+            yield _a_pandas(pa.Table.from_batches([lote]), seleccion)
+        return
+    with ipc.open_file(ruta) as lector:
+        for i in range(lector.num_record_batches):
+            lote = lector.get_batch(i).select(columnas)
+            for inicio in range(0, lote.num_rows, tamano_bloque):
+                yield _a_pandas(pa.Table.from_batches([lote.slice(inicio, tamano_bloque)]), seleccion)
+
+def _tabla_arrow(df):
+    """Tabla Arrow sin diccionarios, para que todos los bloques compartan esquema
+
+    Una columna vacía en el primer bloque llegaría como ``null`` (o como ``double`` si pandas la
+    leyó como NaN) y fijaría ese tipo para todo el archivo; se escribe como texto, al que los
+    bloques siguientes sí se pueden convertir.
+    """
+    import pyarrow as pa
+
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    for i, campo in enumerate(tabla.schema):
+        tipo = campo.type.value_type if pa.types.is_dictionary(campo.type) else campo.type
+        if tabla.num_rows and tabla.column(i).null_count == tabla.num_rows:
+            tipo = pa.string()
+        if tipo != campo.type:
+            tabla = tabla.set_column(i, campo.name, tabla.column(i).cast(tipo))
+    return tabla
+
+class EscritorCSV:
+    """Escribe bloques de resultados en un CSV (comprimido con gzip si termina en .gz)"""
+
+    def __init__(self, ruta):
+        abrir = gzip.open if str(ruta).lower().endswith('.gz') else open
+        self.archivo = abrir(ruta, 'wt', newline='', encoding='utf-8')
+        self.primero = True
+
+    def escribir(self, df):
+        df.to_csv(self.archivo, header=self.primero, index=False)
+        self.primero = False
+
+    def cerrar(self):
+        self.archivo.close()
+
+class EscritorParquet:
+    """Escribe cada bloque como un row group del mismo archivo Parquet"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._escritor = None
+
+    def escribir(self, df):
+        tabla = _tabla_arrow(df)
+        if self._escritor is None:
+            import pyarrow.parquet as pq
+
+            self._escritor = pq.ParquetWriter(self.ruta, tabla.schema)
+        self._escritor.write_table(tabla.cast(self._escritor.schema))
+
+    def cerrar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+
+class EscritorFeather:
+    """Escribe cada bloque como un record batch de un archivo Arrow IPC"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._esquema = None
+        self._escritor = None
+
+    def escribir(self, df):
+        tabla = _tabla_arrow(df)
+        if self._escritor is None:
+            import pyarrow.ipc as ipc
+
+            self._esquema = tabla.schema
+            self._escritor = ipc.new_file(self.ruta, self._esquema)
+        self._escritor.write_table(tabla.cast(self._esquema))
+
+    def cerrar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+
+class EscritorExcel:
+    """Escribe filas en un libro de Excel en modo de solo escritura, sin mantener la hoja en memoria"""
+
+    MAX_FILAS = 1_048_576
+
+    def __init__(self, ruta):
+        from openpyxl import Workbook
+
+        self.ruta = ruta
+        self.libro = Workbook(write_only=True)
+        self.hoja = self.libro.create_sheet('Predicciones')
+        self.filas = 0
+
+    def escribir(self, df):
+        if self.filas == 0:
+            self.hoja.append([str(col) for col in df.columns])
+            self.filas = 1
+        if self.filas + len(df) > self.MAX_FILAS:
+            raise ValueError(f"Excel admite como máximo {self.MAX_FILAS:,} filas; usa CSV o Parquet")
+        for fila in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+            self.hoja.append(fila)
+        self.filas += len(df)
+
+    def cerrar(self):
+        self.libro.save(self.ruta)
+
+escritores = {
+    'csv': EscritorCSV,
+    'parquet': EscritorParquet,
+    'feather': EscritorFeather,
+    'xlsx': EscritorExcel
+}
+
+def crear_escritor(ruta):
+    """Escritor incremental según la extensión de la ruta de salida"""
+    formato = formato_archivo(ruta)
+    if formato not in escritores:
+        raise ValueError(f"Formato de salida no soportado: {ruta}")
+    return escritores[formato](ruta)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Instrumentación ligera de las etapas de la aplicación.
+
+``Instrumentacion.tramo`` mide el tiempo de reloj y la memoria residente (RSS)
+antes y después de cada etapa. Cada tramo se guarda para el panel de tiempos
+de la barra lateral y se emite como una línea JSON en el logger
+``blaa.instrumentacion``, de modo que las lentitudes en producción se puedan
+atribuir a una etapa sin conectar un perfilador. Los tramos pueden anidarse
+(p. ej. ``carga_modelo`` dentro de ``prediccion``); cada registro lleva su
+``nivel`` y el total solo suma los del nivel superior.
+"""
+
+import json
+import logging
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger('blaa.instrumentacion')
+if not logger.handlers:
+    _manejador = logging.StreamHandler(sys.stderr)
+    _manejador.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_manejador)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_TAMANO_PAGINA = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+def memoria_rss_mb():
+    """Memoria residente actual en MB (en Linux); en otros sistemas, el pico del proceso"""
+    try:
+        with open('/proc/self/statm') as archivo:
+            return int(archivo.read().split()[1]) * _TAMANO_PAGINA / 1024 ** 2
+    except OSError:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS reporta bytes; Linux y BSD, kilobytes
+        return pico / 1024 ** 2 if sys.platform == 'darwin' else pico / 1024
+
+class Instrumentacion:
+    """Registra los tramos medidos durante una ejecución del script"""
+
+    def __init__(self, ejecucion=None):
+        # Identifica la ejecución en el log, p. ej. para separar las líneas de sesiones concurrentes
+        self.ejecucion = ejecucion
+        self.tramos = []
+        self._nivel = 0
+
+    @contextmanager
+    def tramo(self, nombre, **atributos):
+        rss_inicial = memoria_rss_mb()
+        inicio = time.perf_counter()
+        nivel = self._nivel
+        self._nivel += 1
+        try:
+            yield atributos
+        finally:
+            self._nivel = nivel
+            rss_final = memoria_rss_mb()
+            registro = {
+                'tramo': nombre,
+                'nivel': nivel,
+                'ms': round((time.perf_counter() - inicio) * 1000, 3),
+                'rss_mb': round(rss_final, 1),
+                'delta_rss_mb': round(rss_final - rss_inicial, 1),
+                **atributos
+            }
+            if self.ejecucion is not None:
+                registro['ejecucion'] = self.ejecucion
+            self.tramos.append(registro)
+            logger.info(json.dumps(registro, ensure_ascii=False, default=str))
+
+    def total_ms(self):
+        """Suma de los tramos de nivel superior (los anidados ya están incluidos en ellos)"""
+        return sum(registro['ms'] for registro in self.tramos if registro['nivel'] == 0)
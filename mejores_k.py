@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Consulta de los K libros más probables sobre catálogos leídos por bloques.
+
+``MejoresK`` conserva solo las K filas con mayor probabilidad vistas hasta el
+momento. Cada bloque se reduce con ``np.partition`` a sus K mejores antes de
+combinarse con las anteriores, así que la memoria es proporcional a K (más el
+bloque en curso) y no al tamaño del catálogo. A igual probabilidad gana la
+fila que apareció antes.
+"""
+
+import numpy as np
+import pandas as pd
+
+def seleccionar_mejores(probabilidades, posiciones, k):
+    """Índices de las k mayores probabilidades, de mayor a menor (empates por posición)"""
+    n = len(probabilidades)
+    if n > k:
+        umbral = np.partition(probabilidades, n - k)[n - k]
+        candidatas = np.flatnonzero(probabilidades >= umbral)
+    else:
+        candidatas = np.arange(n)
+    orden = np.lexsort((posiciones[candidatas], -probabilidades[candidatas]))
+    return candidatas[orden[:k]]
+
+class MejoresK:
+    """Las K filas más probables de todos los bloques agregados"""
+
+    def __init__(self, k, columna='Probabilidad'):
+        if k < 1:
+            raise ValueError("K debe ser al menos 1")
+        self.k = k
+        self.columna = columna
+        self.filas = None
+        self.probabilidades = np.empty(0)
+        self.posiciones = np.empty(0, dtype=np.int64)
+        self.vistas = 0
+
+    def agregar(self, df, probabilidades=None):
+        """Incorpora un bloque; por defecto toma las probabilidades de su columna ``columna``"""
+        if probabilidades is None:
+            probabilidades = df[self.columna].to_numpy()
+        probabilidades = np.asarray(probabilidades, dtype=np.float64)
+        posiciones = np.arange(self.vistas, self.vistas + len(df))
+        self.vistas += len(df)
+
+        mejores = seleccionar_mejores(probabilidades, posiciones, self.k)
+        candidatos = df.iloc[mejores]
+        if self.filas is not None:
+            candidatos = pd.concat([self.filas, candidatos], ignore_index=True)
+            probabilidades = np.concatenate([self.probabilidades, probabilidades[mejores]])
+            posiciones = np.concatenate([self.posiciones, posiciones[mejores]])
+            mejores = seleccionar_mejores(probabilidades, posiciones, self.k)
+            candidatos = candidatos.iloc[mejores]
+        self.filas = candidatos.reset_index(drop=True)
+        self.probabilidades = probabilidades[mejores]
+        self.posiciones = posiciones[mejores]
+        return self
+
+    def resultado(self):
+        """DataFrame con las K filas (o menos) ordenadas de mayor a menor probabilidad"""
+        return self.filas if self.filas is not None else pd.DataFrame()
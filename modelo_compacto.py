@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Versión compacta del pipeline de regresión logística.
+
+``exportar_modelo`` convierte el pipeline de scikit-learn (OneHotEncoder +
+LogisticRegression) en un directorio con:
+
+- ``pesos.npy``: todos los coeficientes en un arreglo float64 que se abre como
+  memoria mapeada. Cada columna ocupa un bloque precedido por un 0.0, que es el
+  peso usado para categorías desconocidas.
+- ``metadatos.json``: intercepto, huella del .pkl de origen y, por columna, la
+  lista de categorías y el inicio de su bloque en ``pesos.npy``.
+
+``ModeloCompacto`` calcula las probabilidades con búsquedas vectorizadas y una
+sigmoide, sin cargar scikit-learn. Se usa automáticamente desde
+``cargar_modelo`` cuando el directorio existe y corresponde al .pkl.
+
+Uso:
+    python modelo_compacto.py exportar --modelo modelo_BLAA.pkl
+    python modelo_compacto.py comparar catalogo.csv --modelo modelo_BLAA.pkl
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from utilidades_modelo import RUTA_MODELO, directorio_compacto, huella_modelo
+
+VERSION_FORMATO = 1
+
+def _codificadores(preprocesador):
+    """Lista (codificador, columnas) en el orden en que generan las variables"""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder
+
+    if isinstance(preprocesador, OneHotEncoder):
+        return [(preprocesador, list(preprocesador.feature_names_in_))]
+    if isinstance(preprocesador, ColumnTransformer):
+        codificadores = []
+        for nombre, transformador, columnas in preprocesador.transformers_:
+            if transformador == 'drop':
+                continue
+            if not isinstance(transformador, OneHotEncoder):
+                raise ValueError(f"Transformador no soportado en '{nombre}': {transformador!r}")
+            codificadores.append((transformador, list(columnas)))
+        return codificadores
+    raise ValueError(f"Preprocesador no soportado: {preprocesador!r}")
+
+def _valor_json(valor):
+    if isinstance(valor, float) and np.isnan(valor):
+        return None
+    return valor.item() if isinstance(valor, np.generic) else valor
+
+def extraer_tablas(modelo):
+    """Intercepto y, por columna, categorías con su peso a partir del pipeline entrenado"""
+    from sklearn.pipeline import Pipeline
+
+    if not isinstance(modelo, Pipeline) or len(modelo.steps) != 2:
+        raise ValueError("Se esperaba un Pipeline de dos pasos (codificador + regresión logística)")
+    preprocesador, clasificador = modelo.steps[0][1], modelo.steps[-1][1]
+    if getattr(clasificador, 'coef_', None) is None or len(clasificador.classes_) != 2:
+        raise ValueError("El clasificador debe ser una regresión logística binaria entrenada")
+
+    coeficientes = clasificador.coef_[0]
+    tablas = []
+    posicion = 0
+    for codificador, columnas in _codificadores(preprocesador):
+        if getattr(codificador, '_infrequent_enabled', False):
+            raise ValueError("Las categorías infrecuentes del OneHotEncoder no están soportadas")
+        descartadas = codificador.drop_idx_
+        for i, (columna, categorias) in enumerate(zip(columnas, codificador.categories_)):
+            descartada = None if descartadas is None else descartadas[i]
+            pesos = np.zeros(len(categorias))
+            conservadas = [j for j in range(len(categorias)) if j != descartada]
+            pesos[conservadas] = coeficientes[posicion:posicion + len(conservadas)]
+            posicion += len(conservadas)
+            tablas.append({
+                'nombre': columna,
+                'categorias': categorias,
+                'pesos': pesos,
+                'desconocidas': codificador.handle_unknown
+            })
+    if posicion != len(coeficientes):
+        raise ValueError("El número de variables del codificador no coincide con los coeficientes")
+    return float(clasificador.intercept_[0]), tablas
+
+def exportar_modelo(ruta_modelo=RUTA_MODELO, destino=None):
+    """Escribe la versión compacta de un .pkl y devuelve el directorio"""
+    import joblib
+
+    destino = destino or directorio_compacto(ruta_modelo)
+    intercepto, tablas = extraer_tablas(joblib.load(ruta_modelo))
+    os.makedirs(destino, exist_ok=True)
+
+    bloques, columnas, inicio = [], [], 0
+    for tabla in tablas:
+        bloques.append(np.concatenate([[0.0], tabla['pesos']]))
+        columnas.append({
+            'nombre': tabla['nombre'],
+            'inicio': inicio,
+            'categorias': [_valor_json(valor) for valor in tabla['categorias']],
+            'desconocidas': tabla['desconocidas']
+        })
+        inicio += len(bloques[-1])
+    np.save(os.path.join(destino, 'pesos.npy'), np.concatenate(bloques))
+    with open(os.path.join(destino, 'metadatos.json'), 'w', encoding='utf-8') as archivo:
+        json.dump({
+            'version': VERSION_FORMATO,
+            'huella': huella_modelo(ruta_modelo),
+            'intercepto': intercepto,
+            'columnas': columnas
+        }, archivo, ensure_ascii=False)
+    return destino
+
+class ModeloCompacto:
+    """Puntuador de la regresión logística a partir de tablas de pesos por categoría"""
+
+    def __init__(self, directorio):
+        with open(os.path.join(directorio, 'metadatos.json'), encoding='utf-8') as archivo:
+            metadatos = json.load(archivo)
+        if metadatos['version'] != VERSION_FORMATO:
+            raise ValueError(f"Versión de formato no soportada: {metadatos['version']}")
+        self.huella = metadatos['huella']
+        self.intercepto = metadatos['intercepto']
+        self.pesos = np.load(os.path.join(directorio, 'pesos.npy'), mmap_mode='r')
+        self.columnas = [
+            (col['nombre'],
+             pd.Index([np.nan if valor is None else valor for valor in col['categorias']], dtype=object),
+             col['inicio'],
+             col['desconocidas'])
+            for col in metadatos['columnas']
+        ]
+
+    def decision_function(self, df):
+        logit = np.full(len(df), self.intercepto)
+        for nombre, categorias, inicio, desconocidas in self.columnas:
+            posiciones = categorias.get_indexer(df[nombre])
+            if desconocidas == 'error' and (posiciones < 0).any():
+                raise ValueError(f"Categorías desconocidas en la columna '{nombre}'")
+            # El -1 de las desconocidas cae en el 0.0 que precede al bloque
+            logit += self.pesos[inicio + 1 + posiciones]
+        return logit
+
+    def predict_proba(self, df):
+        probabilidades = np.exp(-np.logaddexp(0.0, -self.decision_function(df)))
+        return np.column_stack([1.0 - probabilidades, probabilidades])
+
+def categorias_modelo(modelo):
+    """Categorías conocidas por columna de un pipeline o ModeloCompacto; None si no se pueden extraer"""
+    if isinstance(modelo, ModeloCompacto):
+        return {nombre: list(categorias) for nombre, categorias, _, _ in modelo.columnas}
+    try:
+        _, tablas = extraer_tablas(modelo)
+    except (ValueError, AttributeError):
+        return None
+    return {tabla['nombre']: list(tabla['categorias']) for tabla in tablas}
+
+def comparar(ruta_modelo, df):
+    """Tiempo de carga, latencia por fila y diferencia máxima frente a scikit-learn"""
+    inicio = time.perf_counter()
+    import joblib
+    modelo = joblib.load(ruta_modelo)
+    carga_sklearn = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    compacto = ModeloCompacto(directorio_compacto(ruta_modelo))
+    carga_compacto = time.perf_counter() - inicio
+
+    muestra = [df.iloc[[i]] for i in range(min(200, len(df)))]
+    latencias = {}
+    for nombre, puntuador in (('sklearn', modelo), ('compacto', compacto)):
+        inicio = time.perf_counter()
+        for fila in muestra:
+            puntuador.predict_proba(fila)
+        latencias[nombre] = (time.perf_counter() - inicio) / len(muestra)
+
+    diferencia = np.abs(modelo.predict_proba(df)[:, 1] - compacto.predict_proba(df)[:, 1]).max()
+    return {
+        'carga_sklearn_s': carga_sklearn,
+        'carga_compacto_s': carga_compacto,
+        'latencia_fila_sklearn_s': latencias['sklearn'],
+        'latencia_fila_compacto_s': latencias['compacto'],
+        'diferencia_maxima': float(diferencia)
+    }
+
+def main(argv=None):
+    from preprocesamiento import preprocess_dataframe
+    from resolucion_columnas import normalizar_columnas
+
+    parser = argparse.ArgumentParser(description="Exporta y verifica la versión compacta del modelo")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    exportar = subparsers.add_parser('exportar', help="Genera el directorio compacto a partir del .pkl")
+    exportar.add_argument('--modelo', default=RUTA_MODELO)
+    exportar.add_argument('--destino', default=None)
+    comparar_parser = subparsers.add_parser('comparar', help="Compara carga, latencia y resultados")
+    comparar_parser.add_argument('entrada', help="Archivo CSV con el catálogo")
+    comparar_parser.add_argument('--modelo', default=RUTA_MODELO)
+    args = parser.parse_args(argv)
+
+    if args.comando == 'exportar':
+        print(f"✅ Modelo compacto escrito en {exportar_modelo(args.modelo, args.destino)}")
+        return 0
+
+    df, _ = normalizar_columnas(pd.read_csv(args.entrada))
+    resultado = comparar(args.modelo, preprocess_dataframe(df))
+    for clave, valor in resultado.items():
+        print(f"{clave:>26}: {valor:.3g}")
+    return 0 if resultado['diferencia_maxima'] <= 1e-9 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Motor de puntuación en paralelo con un pool de procesos.
+
+Divide el DataFrame en fragmentos contiguos y ejecuta ``predict_proba`` del
+pipeline de ``modelo_BLAA.pkl`` en varios procesos. Cada proceso carga el
+modelo una sola vez al iniciar y los resultados se devuelven en el mismo orden
+de las filas, idénticos a la ruta serial.
+
+Reporte de rendimiento:
+    python motor_paralelo.py catalogo.csv --procesos 1 2 4 8
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from preprocesamiento import preprocess_dataframe
+from resolucion_columnas import normalizar_columnas
+from utilidades_modelo import RUTA_MODELO, cargar_modelo
+
+FILAS_POR_FRAGMENTO = 50_000
+
+# Por debajo de este número de filas el costo de repartir supera la ganancia
+UMBRAL_PARALELO = 100_000
+
+_modelo_proceso = None
+
+def _inicializar_proceso(ruta_modelo):
+    """Carga el modelo una vez por proceso trabajador"""
+    global _modelo_proceso
+    _modelo_proceso = cargar_modelo(ruta_modelo)
+
+def _predecir_fragmento(fragmento):
+    return _modelo_proceso.predict_proba(fragmento)
+
+class MotorParalelo:
+    """Expone ``predict_proba`` como el modelo, pero repartido en procesos"""
+
+    def __init__(self, procesos=None, ruta_modelo=RUTA_MODELO, filas_por_fragmento=FILAS_POR_FRAGMENTO):
+        self.procesos = procesos or os.cpu_count() or 1
+        self.ruta_modelo = ruta_modelo
+        self.filas_por_fragmento = filas_por_fragmento
+        self._candado = threading.Lock()
+        self._pool = self._crear_pool()
+
+    def _crear_pool(self):
+        # 'spawn' evita heredar hilos (p. ej. los del servidor de Streamlit) al hacer fork
+        return ProcessPoolExecutor(
+            max_workers=self.procesos,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_inicializar_proceso,
+            initargs=(self.ruta_modelo,)
+        )
+
+    def redimensionar(self, procesos):
+        """Cambia el número de procesos; las predicciones ya enviadas terminan en el pool anterior"""
+        with self._candado:
+            if procesos == self.procesos:
+                return
+            anterior = self._pool
+            self.procesos = procesos
+            self._pool = self._crear_pool()
+        anterior.shutdown(wait=False)
+
+    def tamano_bytes(self):
+        """Memoria aproximada de los procesos: cada uno carga su propia copia del modelo"""
+        return self.procesos * os.path.getsize(self.ruta_modelo)
+
+    def calentar(self):
+        """Arranca todos los procesos para que la carga del modelo no cuente en la primera predicción"""
+        list(self._pool.map(time.sleep, [0.01] * self.procesos))
+
+    def predict_proba(self, df):
+        n_fragmentos = max(1, min(self.procesos * 4, -(-len(df) // self.filas_por_fragmento)))
+        limites = np.linspace(0, len(df), n_fragmentos + 1, dtype=int)
+        fragmentos = [df.iloc[inicio:fin] for inicio, fin in zip(limites[:-1], limites[1:])]
+        # map envía todos los fragmentos de una vez; el candado evita enviarlos a un pool que se está reemplazando
+        with self._candado:
+            resultados = self._pool.map(_predecir_fragmento, fragmentos)
+        return np.concatenate(list(resultados))
+
+    def cerrar(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+def reporte_rendimiento(df, lista_procesos, ruta_modelo=RUTA_MODELO):
+    """Mide filas/s para cada número de procesos y verifica que coincida con la ruta serial"""
+    modelo = cargar_modelo(ruta_modelo)
+    inicio = time.perf_counter()
+    referencia = modelo.predict_proba(df)
+    segundos = time.perf_counter() - inicio
+    reporte = [{'procesos': 'serial', 'filas': len(df), 'segundos': segundos,
+                'filas_por_segundo': len(df) / segundos, 'identico': True}]
+    for procesos in lista_procesos:
+        with MotorParalelo(procesos, ruta_modelo) as motor:
+            motor.calentar()
+            inicio = time.perf_counter()
+            probabilidades = motor.predict_proba(df)
+            segundos = time.perf_counter() - inicio
+        reporte.append({'procesos': procesos, 'filas': len(df), 'segundos': segundos,
+                        'filas_por_segundo': len(df) / segundos,
+                        'identico': bool(np.array_equal(probabilidades, referencia))})
+    return reporte
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reporte de rendimiento del motor paralelo")
+    parser.add_argument('entrada', help="Archivo CSV con el catálogo")
+    parser.add_argument('--procesos', type=int, nargs='+', default=[1, 2, 4],
+                        help="Números de procesos a medir")
+    parser.add_argument('--ruta-modelo', default=RUTA_MODELO)
+    args = parser.parse_args(argv)
+
+    df, _ = normalizar_columnas(pd.read_csv(args.entrada))
+    df = preprocess_dataframe(df)
+    print(f"{'procesos':>8} {'filas':>10} {'segundos':>9} {'filas/s':>12} idéntico")
+    for fila in reporte_rendimiento(df, args.procesos, args.ruta_modelo):
+        print(f"{fila['procesos']:>8} {fila['filas']:>10} {fila['segundos']:>9.3f} "
+              f"{fila['filas_por_segundo']:>12,.0f} {'sí' if fila['identico'] else 'NO'}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
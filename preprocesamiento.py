@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Preprocesamiento del DataFrame antes de predecir.
+
+Construye un DataFrame nuevo solo con las columnas del modelo (y la columna
+identificadora, si existe), sin copiar el resto de los datos. Cada columna
+del modelo se convierte a ``category`` y la normalización se aplica sobre
+las categorías, no sobre cada fila:
+
+- se recortan y colapsan los espacios en blanco;
+- si se conoce el vocabulario del modelo, cada valor se lleva a la grafía con
+  la que el modelo fue entrenado: variantes de mayúsculas, tildes, puntuación,
+  orden de las palabras y errores menores (ver ``canonicalizacion``). Sin
+  vocabulario no se cambia nada más, porque el codificador del modelo
+  distingue entre grafías.
+"""
+
+import numpy as np
+import pandas as pd
+
+from canonicalizacion import IndiceCanonico, palabras_vacias
+from resolucion_columnas import es_columna_id
+from utilidades_modelo import columnas_modelo, normalizar_texto
+
+def construir_vocabulario(categorias):
+    """{columna: IndiceCanonico} a partir de las categorías conocidas por el modelo"""
+    return {
+        col: IndiceCanonico(valores, palabras_vacias.get(col, ()))
+        for col, valores in categorias.items()
+    }
+
+def vocabulario_modelo(modelo):
+    """Vocabulario para ``preprocess_dataframe`` a partir de un modelo; None si no se puede extraer"""
+    from modelo_compacto import categorias_modelo
+
+    categorias = categorias_modelo(modelo)
+    return construir_vocabulario(categorias) if categorias else None
+
+def normalizar_categorica(serie, indice=None):
+    """Convierte a ``category`` y normaliza sus categorías, uniendo las que quedan iguales"""
+    if not isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype('category')
+    categorias = serie.cat.categories
+    normalizadas = [normalizar_texto(valor) for valor in categorias]
+    if indice is not None:
+        normalizadas = indice.canonizar(normalizadas)
+    if list(categorias) == normalizadas:
+        return serie
+    inversa, nuevas = pd.factorize(pd.Index(normalizadas, dtype=object))
+    codigos = serie.cat.codes.to_numpy()
+    codigos = np.where(codigos >= 0, inversa[codigos], -1)
+    return pd.Series(
+        pd.Categorical.from_codes(codigos, categories=nuevas),
+        index=serie.index, name=serie.name
+    )
+
+def preprocess_dataframe(df, vocabulario=None):
+    """Preprocesa el DataFrame para el modelo"""
+    vocabulario = vocabulario or {}
+    datos = {}
+    id_col = next((col for col in df.columns if es_columna_id(col)), None)
+    if id_col is not None:
+        datos[id_col] = df[id_col]
+    for col in columnas_modelo:
+        if col in df.columns:
+            datos[col] = normalizar_categorica(df[col], vocabulario.get(col))
+    return pd.DataFrame(datos, index=df.index)
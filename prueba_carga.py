@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Prueba de carga local para ``servicio_prediccion.py``.
+
+Lanza solicitudes individuales concurrentes con registros tomados de un
+catálogo CSV y reporta el rendimiento y las latencias p50/p99 medidas por el
+cliente, junto con las métricas que reporta el servicio.
+
+Uso:
+    python prueba_carga.py catalogo.csv --url http://localhost:8600 --concurrencia 64 --solicitudes 5000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+import aiohttp
+import numpy as np
+import pandas as pd
+
+from resolucion_columnas import normalizar_columnas
+from utilidades_modelo import columnas_modelo
+
+async def _cliente(sesion, url, registros, indices, latencias):
+    for i in indices:
+        inicio = time.perf_counter()
+        async with sesion.post(f"{url}/predecir", json=registros[i]) as respuesta:
+            respuesta.raise_for_status()
+            await respuesta.json()
+        latencias.append(time.perf_counter() - inicio)
+
+async def prueba_carga(url, registros, concurrencia, solicitudes):
+    latencias = []
+    asignaciones = np.array_split(np.arange(solicitudes) % len(registros), concurrencia)
+    conector = aiohttp.TCPConnector(limit=concurrencia)
+    async with aiohttp.ClientSession(connector=conector) as sesion:
+        inicio = time.perf_counter()
+        await asyncio.gather(*(
+            _cliente(sesion, url, registros, indices, latencias) for indices in asignaciones
+        ))
+        duracion = time.perf_counter() - inicio
+        async with sesion.get(f"{url}/metricas") as respuesta:
+            metricas_servicio = await respuesta.json()
+    latencias = np.array(latencias) * 1000
+    return {
+        'solicitudes': len(latencias),
+        'solicitudes_por_segundo': len(latencias) / duracion,
+        'cliente_p50_ms': float(np.percentile(latencias, 50)),
+        'cliente_p99_ms': float(np.percentile(latencias, 99)),
+        'servicio': metricas_servicio
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio de predicción")
+    parser.add_argument('entrada', help="Archivo CSV con registros de ejemplo")
+    parser.add_argument('--url', default='http://localhost:8600')
+    parser.add_argument('--concurrencia', type=int, default=64)
+    parser.add_argument('--solicitudes', type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    df, _ = normalizar_columnas(pd.read_csv(args.entrada, nrows=args.solicitudes))
+    df = df[columnas_modelo].astype(object)
+    registros = df.where(df.notna(), None).to_dict('records')
+    resultado = asyncio.run(prueba_carga(args.url, registros, args.concurrencia, args.solicitudes))
+
+    print(f"Solicitudes: {resultado['solicitudes']} ({resultado['solicitudes_por_segundo']:,.0f}/s)")
+    print(f"Cliente   p50: {resultado['cliente_p50_ms']:.2f} ms  p99: {resultado['cliente_p99_ms']:.2f} ms")
+    servicio = resultado['servicio']
+    if 'latencia_p50_ms' in servicio:
+        print(f"Servicio  p50: {servicio['latencia_p50_ms']:.2f} ms  p99: {servicio['latencia_p99_ms']:.2f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
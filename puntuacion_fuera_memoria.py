@@ -0,0 +1,315 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Puntuación fuera de memoria de catálogos más grandes que la RAM.
+
+El catálogo se convierte una sola vez a un formato intermedio en un directorio:
+
+- ``<columna>.i32``: códigos de diccionario (int32, -1 = faltante) de
+  ``Categoria``, ``Author`` y ``Publisher``, uno por fila;
+- ``diccionarios.json``: los valores distintos de cada columna, en orden de código;
+- ``id.bin`` e ``id.off``: si el catálogo tiene columna identificadora, sus
+  valores como texto UTF-8 concatenado y el desplazamiento (int64) de cada fila,
+  para que las predicciones exportadas se puedan unir de vuelta al catálogo;
+- ``probabilidad.f32``: una probabilidad float32 por fila (NaN = sin puntuar);
+- ``metadatos.json``: filas, modelo y filas ya puntuadas.
+
+Los archivos de códigos y probabilidades se abren con ``np.memmap``, así que
+la puntuación recorre el catálogo en ventanas de tamaño fijo sin cargarlo
+completo. Los diccionarios se normalizan con el vocabulario del modelo una sola
+vez, no en cada ventana. Después de cada ventana se guardan las
+probabilidades y se anota el avance en ``metadatos.json``; si el proceso se
+interrumpe, la siguiente ejecución continúa desde la última ventana completa
+(mientras el modelo sea el mismo, aunque cambie el tamaño de ventana).
+
+Uso:
+    python puntuacion_fuera_memoria.py convertir catalogo.csv intermedio/
+    python puntuacion_fuera_memoria.py puntuar intermedio/ --tamano-ventana 1000000
+    python puntuacion_fuera_memoria.py exportar intermedio/ predicciones.parquet
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_integer_dtype
+
+from almacen_predicciones import AlmacenPredicciones
+from cache_predicciones import CacheLRU, predecir_unicos
+from estadisticas import AcumuladorEstadisticas
+from formatos import crear_escritor
+from preprocesamiento import normalizar_categorica, vocabulario_modelo
+from resolucion_columnas import es_columna_id
+from utilidades_modelo import cargar_modelos, columnas_modelo, huella_modelo
+
+VERSION_FORMATO = 2
+TAMANO_VENTANA = 1_000_000
+TAMANO_BLOQUE = 100_000
+
+def _ruta(directorio, nombre):
+    return os.path.join(directorio, nombre)
+
+def _abrir(ruta, tipo, modo, filas):
+    # np.memmap no admite archivos vacíos
+    if not filas:
+        return np.empty(0, dtype=tipo)
+    return np.memmap(ruta, dtype=tipo, mode=modo, shape=(filas,))
+
+def _escribir_json(ruta, datos):
+    """Escritura atómica: una interrupción no deja el archivo a medias"""
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as archivo:
+        json.dump(datos, archivo, ensure_ascii=False)
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    os.replace(temporal, ruta)
+
+def _valor_json(valor):
+    return valor.item() if isinstance(valor, np.generic) else valor
+
+def convertir(ruta_entrada, directorio, tamano_bloque=TAMANO_BLOQUE):
+    """Escribe el intermedio a partir de un catálogo leído por bloques; devuelve el número de filas"""
+    # Import diferido: puntuacion_lotes importa el motor paralelo y los escritores
+    from puntuacion_lotes import leer_por_bloques
+
+    os.makedirs(directorio, exist_ok=True)
+    # Sin metadatos el directorio no se considera un intermedio completo
+    if os.path.exists(_ruta(directorio, 'metadatos.json')):
+        os.remove(_ruta(directorio, 'metadatos.json'))
+    diccionarios = {col: {} for col in columnas_modelo}
+    archivos = {col: open(_ruta(directorio, f'{col}.i32'), 'wb') for col in columnas_modelo}
+    filas = 0
+    # La columna identificadora no se codifica por diccionario: sus valores casi nunca se repiten
+    id_col, id_entero, desplazamiento = None, True, 0
+    try:
+        for bloque in leer_por_bloques(ruta_entrada, tamano_bloque):
+            if not filas:
+                id_col = next((col for col in bloque.columns if es_columna_id(col)), None)
+                if id_col is not None:
+                    archivos['id.bin'] = open(_ruta(directorio, 'id.bin'), 'wb')
+                    archivos['id.off'] = open(_ruta(directorio, 'id.off'), 'wb')
+                    np.zeros(1, dtype=np.int64).tofile(archivos['id.off'])
+            if id_col is not None:
+                valores = bloque[id_col]
+                id_entero = id_entero and is_integer_dtype(valores.dtype) and bool(valores.notna().all())
+                textos = [
+                    str(valor).encode('utf-8')
+                    for valor in valores.astype(object).where(valores.notna(), '')
+                ]
+                finales = desplazamiento + np.cumsum([len(texto) for texto in textos], dtype=np.int64)
+                archivos['id.bin'].write(b''.join(textos))
+                finales.tofile(archivos['id.off'])
+                if len(finales):
+                    desplazamiento = int(finales[-1])
+            for col in columnas_modelo:
+                codigos, unicos = pd.factorize(bloque[col])
+                if len(unicos):
+                    diccionario = diccionarios[col]
+                    globales = np.array(
+                        [diccionario.setdefault(valor, len(diccionario)) for valor in unicos], dtype=np.int32
+                    )
+                    codigos = np.where(codigos >= 0, globales[codigos], -1)
+                codigos.astype(np.int32).tofile(archivos[col])
+            filas += len(bloque)
+    finally:
+        for archivo in archivos.values():
+            archivo.close()
+
+    _abrir(_ruta(directorio, 'probabilidad.f32'), np.float32, 'w+', filas)[:] = np.nan
+    if not filas:
+        open(_ruta(directorio, 'probabilidad.f32'), 'wb').close()
+    _escribir_json(_ruta(directorio, 'diccionarios.json'), {
+        col: [_valor_json(valor) for valor in diccionario] for col, diccionario in diccionarios.items()
+    })
+    _escribir_json(_ruta(directorio, 'metadatos.json'), {
+        'version': VERSION_FORMATO,
+        'fuente': os.path.abspath(ruta_entrada),
+        'filas': filas,
+        'columna_id': id_col,
+        'id_entero': id_col is not None and id_entero,
+        'huella_modelo': None,
+        'filas_completadas': 0
+    })
+    return filas
+
+class IntermedioColumnar:
+    """Códigos y probabilidades de un intermedio, abiertos como memoria mapeada"""
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        try:
+            with open(_ruta(directorio, 'metadatos.json'), encoding='utf-8') as archivo:
+                self.metadatos = json.load(archivo)
+        except FileNotFoundError:
+            raise ValueError(f"{directorio} no contiene un intermedio completo; ejecuta 'convertir' primero")
+        if self.metadatos['version'] != VERSION_FORMATO:
+            raise ValueError(f"Versión de formato no soportada: {self.metadatos['version']}")
+        self.filas = self.metadatos['filas']
+        self.codigos = {
+            col: _abrir(_ruta(directorio, f'{col}.i32'), np.int32, 'r', self.filas) for col in columnas_modelo
+        }
+        self.probabilidades = _abrir(_ruta(directorio, 'probabilidad.f32'), np.float32, 'r+', self.filas)
+        with open(_ruta(directorio, 'diccionarios.json'), encoding='utf-8') as archivo:
+            self.diccionarios = {
+                col: pd.Index(valores, dtype=object) for col, valores in json.load(archivo).items()
+            }
+        self.columna_id = self.metadatos['columna_id']
+        if self.columna_id is not None:
+            self.id_desplazamientos = _abrir(_ruta(directorio, 'id.off'), np.int64, 'r', self.filas + 1)
+            tamano = int(self.id_desplazamientos[-1])
+            self.id_textos = _abrir(_ruta(directorio, 'id.bin'), np.uint8, 'r', tamano)
+
+    def guardar_metadatos(self):
+        _escribir_json(_ruta(self.directorio, 'metadatos.json'), self.metadatos)
+
+    def tipos_normalizados(self, vocabulario=None):
+        """Por columna, (remapeo de códigos, dtype) tras normalizar el diccionario con el vocabulario"""
+        vocabulario = vocabulario or {}
+        tipos = {}
+        for col, valores in self.diccionarios.items():
+            serie = pd.Series(pd.Categorical.from_codes(np.arange(len(valores)), categories=valores))
+            normalizada = normalizar_categorica(serie, vocabulario.get(col))
+            tipos[col] = (normalizada.cat.codes.to_numpy(), normalizada.dtype)
+        return tipos
+
+    def ventana(self, inicio, fin, tipos):
+        """DataFrame de las filas [inicio, fin) con columnas ``category`` ya normalizadas"""
+        datos = {}
+        for col in columnas_modelo:
+            remapeo, tipo = tipos[col]
+            codigos = np.asarray(self.codigos[col][inicio:fin])
+            if len(remapeo):
+                codigos = np.where(codigos >= 0, remapeo[codigos], -1)
+            datos[col] = pd.Categorical.from_codes(codigos, dtype=tipo)
+        return pd.DataFrame(datos, index=pd.RangeIndex(inicio, fin))
+
+    def identificadores(self, inicio, fin):
+        """Valores de la columna identificadora de las filas [inicio, fin)"""
+        limites = np.asarray(self.id_desplazamientos[inicio:fin + 1])
+        textos = bytes(self.id_textos[limites[0]:limites[-1]]) if fin > inicio else b''
+        limites = limites - limites[0]
+        valores = [textos[a:b].decode('utf-8') or None for a, b in zip(limites[:-1], limites[1:])]
+        if self.metadatos['id_entero']:
+            return np.array(valores, dtype=np.int64)
+        return valores
+
+    def decodificar(self, inicio, fin):
+        """Filas [inicio, fin) con su identificador (o número de fila), valores originales y probabilidad"""
+        if self.columna_id is not None:
+            datos = {self.columna_id: self.identificadores(inicio, fin)}
+        else:
+            # Sin identificador, la posición en el catálogo permite unir las predicciones de vuelta
+            datos = {'Fila': np.arange(inicio, fin)}
+        for col in columnas_modelo:
+            valores = self.diccionarios[col]
+            codigos = np.asarray(self.codigos[col][inicio:fin])
+            if len(valores):
+                datos[col] = pd.Categorical.from_codes(codigos, categories=valores)
+            else:
+                datos[col] = [None] * (fin - inicio)
+        datos['Probabilidad'] = np.asarray(self.probabilidades[inicio:fin], dtype=np.float64).round(5)
+        return pd.DataFrame(datos)
+
+def puntuar(directorio, modelo, ruta_modelo, vocabulario=None, tamano_ventana=TAMANO_VENTANA, niveles=(),
+            reanudar=True):
+    """Puntúa el intermedio por ventanas, continuando desde la última completa; devuelve las estadísticas"""
+    intermedio = IntermedioColumnar(directorio)
+    metadatos = intermedio.metadatos
+    huella = huella_modelo(ruta_modelo)
+    if not reanudar or metadatos['huella_modelo'] != huella:
+        # Con otro modelo lo puntuado antes no sirve
+        metadatos.update(huella_modelo=huella, filas_completadas=0)
+        intermedio.guardar_metadatos()
+
+    tipos = intermedio.tipos_normalizados(vocabulario)
+    primera = metadatos['filas_completadas']
+    if primera:
+        print(f"Reanudando desde la fila {primera:,} de {intermedio.filas:,}", file=sys.stderr)
+    inicio_reloj = time.perf_counter()
+    for inicio in range(primera, intermedio.filas, tamano_ventana):
+        fin = min(inicio + tamano_ventana, intermedio.filas)
+        probabilidades = predecir_unicos(modelo, intermedio.ventana(inicio, fin, tipos), niveles)
+        intermedio.probabilidades[inicio:fin] = probabilidades
+        if isinstance(intermedio.probabilidades, np.memmap):
+            intermedio.probabilidades.flush()
+        # Las probabilidades quedan en disco antes de anotar la ventana como completa
+        metadatos['filas_completadas'] = fin
+        intermedio.guardar_metadatos()
+        transcurrido = time.perf_counter() - inicio_reloj
+        print(f"{fin:,} de {intermedio.filas:,} filas "
+              f"({(fin - primera) / transcurrido:,.0f} filas/s)", file=sys.stderr)
+
+    estadisticas = AcumuladorEstadisticas()
+    for inicio in range(0, intermedio.filas, tamano_ventana):
+        estadisticas.agregar(intermedio.probabilidades[inicio:inicio + tamano_ventana])
+    return estadisticas
+
+def exportar(directorio, ruta_salida, tamano_bloque=TAMANO_BLOQUE):
+    """Escribe las filas decodificadas con su probabilidad, por bloques; devuelve el número de filas"""
+    intermedio = IntermedioColumnar(directorio)
+    if intermedio.metadatos['huella_modelo'] is None or intermedio.metadatos['filas_completadas'] < intermedio.filas:
+        raise ValueError("El intermedio no está completamente puntuado; ejecuta 'puntuar' primero")
+    escritor = crear_escritor(ruta_salida)
+    try:
+        for inicio in range(0, intermedio.filas, tamano_bloque):
+            escritor.escribir(intermedio.decodificar(inicio, min(inicio + tamano_bloque, intermedio.filas)))
+    finally:
+        escritor.cerrar()
+    return intermedio.filas
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Puntuación de catálogos más grandes que la memoria")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    convertir_parser = subparsers.add_parser('convertir', help="Convierte el catálogo al intermedio")
+    convertir_parser.add_argument('entrada', help="Catálogo en CSV, Excel (.xlsx), Parquet o Arrow/Feather")
+    convertir_parser.add_argument('directorio')
+    convertir_parser.add_argument('--tamano-bloque', type=int, default=TAMANO_BLOQUE)
+    puntuar_parser = subparsers.add_parser('puntuar', help="Puntúa el intermedio (reanuda si se interrumpió)")
+    puntuar_parser.add_argument('directorio')
+    puntuar_parser.add_argument('--modelo', default=None,
+                                help="Nombre del modelo; por defecto el primero disponible")
+    puntuar_parser.add_argument('--tamano-ventana', type=int, default=TAMANO_VENTANA,
+                                help=f"Filas por ventana (por defecto {TAMANO_VENTANA})")
+    puntuar_parser.add_argument('--almacen', default=None, metavar='RUTA_SQLITE',
+                                help="Almacén persistente de predicciones (p. ej. predicciones_cache.sqlite)")
+    puntuar_parser.add_argument('--desde-cero', action='store_true',
+                                help="Ignora las filas ya puntuadas")
+    exportar_parser = subparsers.add_parser('exportar', help="Escribe las predicciones del intermedio")
+    exportar_parser.add_argument('directorio')
+    exportar_parser.add_argument('salida', help="Archivo de predicciones (.csv, .csv.gz, .parquet o .feather)")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.comando == 'convertir':
+            filas = convertir(args.entrada, args.directorio, args.tamano_bloque)
+            print(f"✅ {filas} filas convertidas en {args.directorio}", file=sys.stderr)
+        elif args.comando == 'exportar':
+            filas = exportar(args.directorio, args.salida)
+            print(f"✅ {filas} predicciones escritas en {args.salida}", file=sys.stderr)
+        else:
+            modelos = cargar_modelos()
+            nombre = args.modelo or next(iter(modelos))
+            if nombre not in modelos:
+                parser.error(f"Modelo desconocido: {nombre}. Disponibles: {', '.join(modelos)}")
+            modelo, ruta_modelo = modelos[nombre], modelos.rutas[nombre]
+            almacen = AlmacenPredicciones(ruta_modelo, args.almacen) if args.almacen else None
+            niveles = [CacheLRU()] + ([almacen] if almacen is not None else [])
+            try:
+                estadisticas = puntuar(args.directorio, modelo, ruta_modelo, vocabulario_modelo(modelo),
+                                       args.tamano_ventana, niveles, reanudar=not args.desde_cero)
+            finally:
+                if almacen is not None:
+                    almacen.cerrar()
+            print(f"✅ {estadisticas.total} filas puntuadas en {args.directorio}", file=sys.stderr)
+            print(f"Probabilidad promedio {estadisticas.promedio:.5f}, alta demanda: {estadisticas.alta}, "
+                  f"media: {estadisticas.media}, baja: {estadisticas.baja}", file=sys.stderr)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
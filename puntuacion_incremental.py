@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Re-puntuación incremental frente al último DataFrame puntuado.
+
+Cada fila se identifica por un hash de 64 bits de sus columnas del modelo.
+Al volver a predecir (filas agregadas en la entrada manual, un catálogo que
+cambió en pocas filas), solo las filas cuyo hash no estaba en la puntuación
+anterior pasan por ``predecir_unicos``; el resto reutiliza su probabilidad.
+"""
+
+import numpy as np
+import pandas as pd
+
+from cache_predicciones import predecir_unicos
+from utilidades_modelo import columnas_modelo
+
+def huellas_filas(df, columnas=columnas_modelo):
+    """Hash por fila de los valores de las columnas del modelo (no depende del índice ni de otras columnas)"""
+    return pd.util.hash_pandas_object(df[columnas], index=False).to_numpy()
+
+class PuntuacionPrevia:
+    """Probabilidades de la última puntuación, ordenadas por hash para buscarlas en bloque"""
+
+    def __init__(self):
+        self.huellas = np.empty(0, dtype=np.uint64)
+        self.probabilidades = np.empty(0)
+
+    def __len__(self):
+        return len(self.huellas)
+
+    def buscar(self, huellas):
+        """Probabilidad previa de cada hash; NaN para filas nuevas o modificadas"""
+        valores = np.full(len(huellas), np.nan)
+        if not len(self.huellas):
+            return valores
+        posiciones = np.searchsorted(self.huellas, huellas)
+        posiciones[posiciones == len(self.huellas)] = 0
+        encontradas = self.huellas[posiciones] == huellas
+        valores[encontradas] = self.probabilidades[posiciones[encontradas]]
+        return valores
+
+    def reemplazar(self, huellas, probabilidades):
+        """Toma como referencia la puntuación recién hecha (sin filas repetidas)"""
+        self.huellas, primeras = np.unique(huellas, return_index=True)
+        self.probabilidades = np.asarray(probabilidades, dtype=float)[primeras]
+
+def filas_cambiadas(df, previa):
+    """(huellas, probabilidades previas con NaN en las filas a calcular, posiciones de esas filas)"""
+    huellas = huellas_filas(df)
+    probabilidades = previa.buscar(huellas)
+    return huellas, probabilidades, np.flatnonzero(np.isnan(probabilidades))
+
+def puntuar_incremental(modelo, df, previa, niveles=()):
+    """Devuelve (probabilidades, filas calculadas) prediciendo solo las filas que cambiaron"""
+    huellas, probabilidades, cambiadas = filas_cambiadas(df, previa)
+    if cambiadas.size:
+        probabilidades[cambiadas] = predecir_unicos(modelo, df.iloc[cambiadas], niveles)
+    previa.reemplazar(huellas, probabilidades)
+    return probabilidades, int(cambiadas.size)
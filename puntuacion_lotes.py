@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Puntuación por lotes (sin interfaz) de catálogos CSV, Excel, Parquet o Arrow/Feather.
+
+Lee el archivo de entrada en bloques de tamaño fijo, predice cada bloque con el
+mismo modelo de la aplicación y escribe los resultados de forma incremental,
+de modo que la memoria usada no depende del tamaño del catálogo.
+
+Uso:
+    python puntuacion_lotes.py catalogo.csv predicciones.csv --tamano-bloque 100000
+    python puntuacion_lotes.py catalogo.parquet predicciones.parquet
+    python puntuacion_lotes.py catalogo.csv top100.csv --top-k 100
+"""
+
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+from almacen_predicciones import AlmacenPredicciones
+from cache_predicciones import CacheLRU, predecir_unicos
+from estadisticas import AcumuladorEstadisticas
+from formatos import crear_escritor, formato_archivo, iterar_columnar
+from mejores_k import MejoresK
+from motor_paralelo import MotorParalelo
+from preprocesamiento import preprocess_dataframe, vocabulario_modelo
+from resolucion_columnas import normalizar_columnas
+from utilidades_modelo import (
+    cargar_modelo, columnas_modelo, rutas_modelos
+)
+
+TAMANO_BLOQUE = 100_000
+
+def _leer_excel_por_bloques(ruta, tamano_bloque):
+    """Itera una hoja de Excel en modo de solo lectura, sin cargarla completa"""
+    from openpyxl import load_workbook
+
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezado = next(filas, None)
+        if encabezado is None:
+            return
+        bloque = []
+        for fila in filas:
+            bloque.append(fila)
+            if len(bloque) == tamano_bloque:
+                yield pd.DataFrame(bloque, columns=encabezado)
+                bloque = []
+        if bloque:
+            yield pd.DataFrame(bloque, columns=encabezado)
+    finally:
+        libro.close()
+
+def leer_por_bloques(ruta, tamano_bloque=TAMANO_BLOQUE):
+    """Genera bloques del archivo de entrada con los nombres de columnas normalizados"""
+    formato = formato_archivo(ruta)
+    if formato in ('parquet', 'feather'):
+        bloques = iterar_columnar(ruta, formato, tamano_bloque)
+    elif formato == 'xlsx':
+        bloques = _leer_excel_por_bloques(ruta, tamano_bloque)
+    else:
+        bloques = pd.read_csv(ruta, chunksize=tamano_bloque)
+    for bloque in bloques:
+        bloque, _ = normalizar_columnas(bloque)
+        faltantes = [col for col in columnas_modelo if col not in bloque.columns]
+        if faltantes:
+            raise ValueError(f"Faltan columnas requeridas para el modelo: {', '.join(faltantes)}")
+        yield bloque
+
+def puntuar_bloque(modelo, df, niveles=(), vocabulario=None):
+    """Agrega la columna 'Probabilidad' a un bloque ya normalizado; devuelve (df, estadísticas)"""
+    # Se predice sobre la versión preprocesada, pero se conservan todas las columnas de entrada
+    probabilidades = predecir_unicos(modelo, preprocess_dataframe(df, vocabulario), niveles)
+    df['Probabilidad'] = probabilidades.round(5)
+    return df, AcumuladorEstadisticas.desde(probabilidades)
+
+def puntuar_archivo(ruta_entrada, ruta_salida, modelo, tamano_bloque=TAMANO_BLOQUE, almacen=None,
+                    vocabulario=None, top_k=None):
+    """Puntúa un archivo completo bloque a bloque y devuelve las estadísticas acumuladas
+
+    Con ``top_k`` solo se escriben las ``top_k`` filas más probables, ordenadas de mayor a menor;
+    las estadísticas siguen cubriendo todo el catálogo.
+    """
+    # Las combinaciones repetidas entre bloques se resuelven desde la caché
+    niveles = [CacheLRU()] + ([almacen] if almacen is not None else [])
+    escritor = crear_escritor(ruta_salida)
+    mejores = MejoresK(top_k) if top_k else None
+    estadisticas = AcumuladorEstadisticas()
+    inicio = time.perf_counter()
+    try:
+        for bloque in leer_por_bloques(ruta_entrada, tamano_bloque):
+            resultado, estadisticas_bloque = puntuar_bloque(modelo, bloque, niveles, vocabulario)
+            if mejores is not None:
+                mejores.agregar(resultado)
+            else:
+                escritor.escribir(resultado)
+            total = estadisticas.fusionar(estadisticas_bloque).total
+            transcurrido = time.perf_counter() - inicio
+            print(f"{total} filas ({total / transcurrido:,.0f} filas/s)", file=sys.stderr)
+        if mejores is not None and mejores.vistas:
+            escritor.escribir(mejores.resultado())
+    finally:
+        escritor.cerrar()
+    return estadisticas
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Puntuación por lotes de catálogos de libros")
+    parser.add_argument('entrada', help="Catálogo en CSV, Excel (.xlsx), Parquet o Arrow/Feather")
+    parser.add_argument('salida', help="Archivo de predicciones (.csv, .parquet o .feather/.arrow)")
+    parser.add_argument('--tamano-bloque', type=int, default=TAMANO_BLOQUE,
+                        help=f"Filas por bloque (por defecto {TAMANO_BLOQUE})")
+    parser.add_argument('--modelo', default=None,
+                        help="Nombre del modelo; por defecto el primero disponible")
+    parser.add_argument('--procesos', type=int, default=1,
+                        help="Procesos para predecir cada bloque en paralelo (por defecto 1)")
+    parser.add_argument('--almacen', default=None, metavar='RUTA_SQLITE',
+                        help="Almacén persistente de predicciones (p. ej. predicciones_cache.sqlite)")
+    parser.add_argument('--top-k', type=int, default=None, metavar='K',
+                        help="Escribir solo los K libros más probables, de mayor a menor")
+    args = parser.parse_args(argv)
+    if args.top_k is not None and args.top_k < 1:
+        parser.error("--top-k debe ser al menos 1")
+
+    nombre = args.modelo or next(iter(rutas_modelos))
+    if nombre not in rutas_modelos:
+        parser.error(f"Modelo desconocido: {nombre}. Disponibles: {', '.join(rutas_modelos)}")
+
+    modelo = cargar_modelo(rutas_modelos[nombre])
+    vocabulario = vocabulario_modelo(modelo)
+    if args.procesos > 1:
+        modelo = MotorParalelo(args.procesos, rutas_modelos[nombre])
+    almacen = AlmacenPredicciones(rutas_modelos[nombre], args.almacen) if args.almacen else None
+    try:
+        estadisticas = puntuar_archivo(args.entrada, args.salida, modelo, args.tamano_bloque, almacen,
+                                vocabulario, args.top_k)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if isinstance(modelo, MotorParalelo):
+            modelo.cerrar()
+        if almacen is not None:
+            almacen.cerrar()
+    if args.top_k:
+        print(f"✅ {min(args.top_k, estadisticas.total)} mejores de {estadisticas.total} predicciones "
+              f"escritas en {args.salida}", file=sys.stderr)
+    else:
+        print(f"✅ {estadisticas.total} predicciones escritas en {args.salida}", file=sys.stderr)
+    print(f"Probabilidad promedio {estadisticas.promedio:.5f}, "
+          f"mínima {estadisticas.minimo:.5f}, máxima {estadisticas.maximo:.5f}", file=sys.stderr)
+    print(f"Alta demanda: {estadisticas.alta}, media: {estadisticas.media}, "
+          f"baja: {estadisticas.baja}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
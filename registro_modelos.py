@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Registro de modelos con carga diferida y desalojo por presupuesto de memoria.
+
+``RegistroModelos`` se comporta como un diccionario de solo lectura nombre ->
+modelo: listar los nombres no carga nada, y cada modelo se lee de disco la
+primera vez que se pide. Los modelos cargados se conservan en orden de uso y,
+cuando su tamaño total supera el presupuesto, se descarta el usado hace más
+tiempo (se volverá a cargar si se vuelve a pedir).
+
+Lo que se construye por modelo (vocabulario, cachés de predicciones, almacén,
+pool de procesos) se guarda como anexo de su entrada con ``anexo``: cuenta en
+el presupuesto y se descarta junto con el modelo.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from modelo_compacto import ModeloCompacto
+from utilidades_modelo import cargar_modelo, directorio_compacto
+
+PRESUPUESTO_BYTES = int(os.environ.get('BLAA_PRESUPUESTO_MODELOS_MB', 1024)) * 1024 ** 2
+
+def tamano_modelo(modelo, ruta_modelo):
+    """Tamaño aproximado en memoria: el de los archivos de los que se cargó el modelo"""
+    if isinstance(modelo, ModeloCompacto):
+        directorio = directorio_compacto(ruta_modelo)
+        return sum(entrada.stat().st_size for entrada in os.scandir(directorio) if entrada.is_file())
+    return os.path.getsize(ruta_modelo)
+
+def tamano_anexo(anexo):
+    """Tamaño aproximado de un anexo: el que declara con ``tamano_bytes()``; los diccionarios suman sus valores"""
+    if isinstance(anexo, dict):
+        return sum(tamano_anexo(valor) for valor in anexo.values())
+    tamano_bytes = getattr(anexo, 'tamano_bytes', None)
+    return tamano_bytes() if tamano_bytes is not None else 0
+
+class RegistroModelos(Mapping):
+    """Modelos por nombre, cargados al primer uso y desalojados en orden LRU; seguro entre hilos"""
+
+    def __init__(self, rutas, presupuesto_bytes=PRESUPUESTO_BYTES):
+        self.rutas = dict(rutas)
+        self.presupuesto_bytes = presupuesto_bytes
+        self.bytes_usados = 0
+        self.cargas = 0
+        # nombre -> (modelo, tamaño del modelo, anexos)
+        self._cargados = OrderedDict()
+        self._candado = threading.Lock()
+
+    def _cargar(self, nombre):
+        """Entrada del modelo, cargándolo si hace falta; se llama con el candado tomado"""
+        if nombre in self._cargados:
+            self._cargados.move_to_end(nombre)
+            return self._cargados[nombre]
+        ruta = self.rutas[nombre]
+        modelo = cargar_modelo(ruta)
+        self._cargados[nombre] = (modelo, tamano_modelo(modelo, ruta), {})
+        self.cargas += 1
+        self._desalojar()
+        return self._cargados[nombre]
+
+    def _desalojar(self):
+        # Los anexos crecen con el uso (p. ej. las cachés), así que se vuelven a medir en cada pasada
+        tamanos = OrderedDict(
+            (nombre, tamano + tamano_anexo(anexos)) for nombre, (_, tamano, anexos) in self._cargados.items()
+        )
+        self.bytes_usados = sum(tamanos.values())
+        # El modelo más reciente nunca se desaloja, aunque por sí solo exceda el presupuesto.
+        # Quien ya tenga el modelo o un anexo desalojado lo sigue usando; se libera al soltarlo
+        while self.bytes_usados > self.presupuesto_bytes and len(self._cargados) > 1:
+            nombre, _ = self._cargados.popitem(last=False)
+            self.bytes_usados -= tamanos.pop(nombre)
+
+    def __getitem__(self, nombre):
+        with self._candado:
+            return self._cargar(nombre)[0]
+
+    def anexo(self, nombre, clave, crear):
+        """Objeto ``clave`` asociado al modelo ``nombre``, construido con ``crear(modelo)`` la primera vez.
+
+        Vive mientras el modelo siga cargado: cuenta en el presupuesto (ver
+        ``tamano_anexo``) y se descarta cuando el modelo se desaloja.
+        """
+        with self._candado:
+            modelo, _, anexos = self._cargar(nombre)
+            if clave not in anexos:
+                anexos[clave] = crear(modelo)
+                self._desalojar()
+            return anexos[clave]
+
+    def __iter__(self):
+        return iter(self.rutas)
+
+    def __len__(self):
+        return len(self.rutas)
+
+    def cargados(self):
+        """Nombres de los modelos en memoria, del usado hace más tiempo al más reciente"""
+        with self._candado:
+            return list(self._cargados)
+
+    def estadisticas(self):
+        with self._candado:
+            # Las cachés crecen entre cargas: se vuelve a medir (y a desalojar si hace falta)
+            self._desalojar()
+            return {
+                'disponibles': len(self.rutas),
+                'cargados': len(self._cargados),
+                'cargas': self.cargas,
+                'mb_usados': self.bytes_usados / 1024 ** 2,
+                'mb_presupuesto': self.presupuesto_bytes / 1024 ** 2
+            }
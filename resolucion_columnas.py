@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Resolución de nombres de columnas con un índice de alias precalculado.
+
+Los alias de ``mapeo_columnas`` y los nombres de ``columnas_modelo`` se
+indexan una sola vez, plegados (sin tildes, sin mayúsculas, espacios
+colapsados). Un encabezado se resuelve primero por coincidencia exacta en ese
+índice y, si no aparece, por similitud aproximada contra los nombres objetivo
+(no contra los alias, que harían pasar p. ej. "Publicado" por "publicador").
+Un encabezado que ya es el nombre objetivo tiene prioridad y bloquea que otro
+se renombre a él. El resultado se memoriza por firma de encabezados, así que
+los reruns y los bloques de un mismo archivo no vuelven a calcular nada.
+"""
+
+import difflib
+from functools import lru_cache
+
+from utilidades_modelo import columnas_modelo, mapeo_columnas, plegar_texto
+
+CORTE_SIMILITUD = 0.8
+
+# Nombres plegados que se reconocen como columna identificadora
+nombres_id = {'id', 'isbn', 'codigo', 'cod', 'identificador', 'registro', 'no. registro'}
+
+def trigramas(texto):
+    relleno = f"  {texto} "
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+class ResolvedorColumnas:
+    """Asigna encabezados arbitrarios a las columnas objetivo del modelo"""
+
+    def __init__(self, objetivos=columnas_modelo, alias=mapeo_columnas, corte=CORTE_SIMILITUD):
+        self.corte = corte
+        self._objetivos = {plegar_texto(objetivo): objetivo for objetivo in objetivos}
+        self._alias = dict(self._objetivos)
+        for nombre, objetivo in alias.items():
+            self._alias.setdefault(plegar_texto(nombre), objetivo)
+        self.resolver = lru_cache(maxsize=1024)(self._resolver)
+
+    def _coincidencia(self, encabezado):
+        """(objetivo, prioridad, puntaje); prioridad 2 si ya es el objetivo, 1 por alias, 0 aproximada"""
+        if encabezado in self._objetivos.values():
+            return encabezado, 2, 1.0
+        clave = plegar_texto(encabezado)
+        if clave in self._alias:
+            return self._alias[clave], 1, 1.0
+        mejor, puntaje = None, 0.0
+        for candidato in sorted(self._objetivos):
+            similitud = difflib.SequenceMatcher(None, clave, candidato).ratio()
+            if similitud > puntaje:
+                mejor, puntaje = candidato, similitud
+        if puntaje >= self.corte:
+            return self._objetivos[mejor], 0, puntaje
+        return None, 0, 0.0
+
+    def _resolver(self, encabezados):
+        nuevos = [str(encabezado).strip() for encabezado in encabezados]
+        # Si varios encabezados apuntan al mismo objetivo, gana el de mayor prioridad y luego el más parecido
+        elegidos = {}
+        for i, encabezado in enumerate(nuevos):
+            objetivo, prioridad, puntaje = self._coincidencia(encabezado)
+            if objetivo is not None and (prioridad, puntaje) > elegidos.get(objetivo, (None, -1, 0.0))[1:]:
+                elegidos[objetivo] = (i, prioridad, puntaje)
+        corregidas = []
+        for objetivo, (i, _, _) in elegidos.items():
+            if nuevos[i] != objetivo:
+                corregidas.append(nuevos[i])
+                nuevos[i] = objetivo
+        return tuple(nuevos), tuple(corregidas)
+
+resolvedor = ResolvedorColumnas()
+
+def es_columna_id(nombre):
+    return nombre not in columnas_modelo and plegar_texto(nombre) in nombres_id
+
+def normalizar_columnas(df):
+    """Renombra en el mismo DataFrame (sin copiar datos) las columnas reconocidas"""
+    nuevos, corregidas = resolvedor.resolver(tuple(df.columns))
+    df.columns = list(nuevos)
+    return df, list(corregidas)
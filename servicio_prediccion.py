@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Servicio HTTP asíncrono de predicción.
+
+Carga los mismos modelos que la aplicación de Streamlit y expone:
+
+- ``POST /predecir``       {"Categoria": ..., "Author": ..., "Publisher": ...}
+- ``POST /predecir/lote``  {"registros": [{...}, ...]}
+- ``GET  /metricas``       latencias p50/p99 y solicitudes atendidas
+- ``GET  /salud``
+
+Las solicitudes concurrentes se agrupan en micro-lotes: mientras el modelo
+predice un lote, las que llegan se acumulan y se resuelven juntas en la
+siguiente llamada vectorizada a ``predict_proba``.
+
+Uso:
+    python servicio_prediccion.py --puerto 8600
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from aiohttp import web
+
+from cache_predicciones import CacheLRU, predecir_unicos
+from preprocesamiento import preprocess_dataframe, vocabulario_modelo
+from utilidades_modelo import cargar_modelos, columnas_modelo
+
+MAX_FILAS_LOTE = 2048
+ESPERA_LOTE_S = 0.002
+MUESTRAS_LATENCIA = 10_000
+
+class MicroLotes:
+    """Agrupa solicitudes concurrentes en una sola predicción vectorizada"""
+
+    def __init__(self, modelo, max_filas=MAX_FILAS_LOTE, espera=ESPERA_LOTE_S):
+        self.modelo = modelo
+        self.vocabulario = vocabulario_modelo(modelo)
+        self.max_filas = max_filas
+        self.espera = espera
+        self.cache = CacheLRU()
+        self._cola = asyncio.Queue()
+        self._tarea = None
+
+    def iniciar(self):
+        self._tarea = asyncio.create_task(self._procesar())
+
+    async def detener(self):
+        self._tarea.cancel()
+
+    async def predecir(self, registros):
+        futuro = asyncio.get_running_loop().create_future()
+        await self._cola.put((registros, futuro))
+        return await futuro
+
+    def _predecir_lote(self, registros):
+        df = preprocess_dataframe(
+            pd.DataFrame.from_records(registros, columns=columnas_modelo), self.vocabulario
+        )
+        return predecir_unicos(self.modelo, df, [self.cache])
+
+    async def _procesar(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pendientes = [await self._cola.get()]
+            filas = len(pendientes[0][0])
+            limite = loop.time() + self.espera
+            while filas < self.max_filas:
+                restante = limite - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    pendiente = await asyncio.wait_for(self._cola.get(), restante)
+                except asyncio.TimeoutError:
+                    break
+                pendientes.append(pendiente)
+                filas += len(pendiente[0])
+
+            registros = [registro for lote, _ in pendientes for registro in lote]
+            try:
+                probabilidades = await loop.run_in_executor(None, self._predecir_lote, registros)
+            except Exception:
+                # Un lote fallido no debe arrastrar a las demás solicitudes: cada una se reintenta sola
+                for lote, futuro in pendientes:
+                    try:
+                        resultado = await loop.run_in_executor(None, self._predecir_lote, lote)
+                    except Exception as e:
+                        if not futuro.done():
+                            futuro.set_exception(e)
+                    else:
+                        if not futuro.done():
+                            futuro.set_result(resultado.tolist())
+                continue
+            inicio = 0
+            for lote, futuro in pendientes:
+                if not futuro.done():
+                    futuro.set_result(probabilidades[inicio:inicio + len(lote)].tolist())
+                inicio += len(lote)
+
+def _validar_registro(registro):
+    if not isinstance(registro, dict):
+        raise web.HTTPBadRequest(reason="Cada registro debe ser un objeto JSON")
+    faltantes = [col for col in columnas_modelo if col not in registro]
+    if faltantes:
+        raise web.HTTPBadRequest(reason=f"Faltan campos: {', '.join(faltantes)}")
+    # El modelo se entrenó con texto: números, booleanos, listas u objetos no son válidos
+    invalidos = [
+        col for col in columnas_modelo
+        if registro[col] is not None and not isinstance(registro[col], str)
+    ]
+    if invalidos:
+        raise web.HTTPBadRequest(reason=f"Los campos deben ser texto o null: {', '.join(invalidos)}")
+    return {col: registro[col] for col in columnas_modelo}
+
+async def _leer_json(request):
+    try:
+        return await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(reason="El cuerpo no es JSON válido")
+
+class MetricasServicio:
+    """Solicitudes atendidas y últimas latencias del servicio"""
+
+    def __init__(self, muestras=MUESTRAS_LATENCIA):
+        self.solicitudes = 0
+        self.latencias = deque(maxlen=muestras)
+
+    def registrar(self, segundos):
+        self.latencias.append(segundos)
+        self.solicitudes += 1
+
+    def resumen(self):
+        latencias = np.array(self.latencias) * 1000
+        cuerpo = {'solicitudes': self.solicitudes}
+        if latencias.size:
+            cuerpo.update({
+                'latencia_p50_ms': float(np.percentile(latencias, 50)),
+                'latencia_p99_ms': float(np.percentile(latencias, 99))
+            })
+        return cuerpo
+
+async def predecir(request):
+    registro = _validar_registro(await _leer_json(request))
+    probabilidades = await request.app['lotes'].predecir([registro])
+    return web.json_response({'probabilidad': probabilidades[0]})
+
+async def predecir_lote(request):
+    cuerpo = await _leer_json(request)
+    registros = cuerpo.get('registros') if isinstance(cuerpo, dict) else cuerpo
+    if not isinstance(registros, list) or not registros:
+        raise web.HTTPBadRequest(reason="Se esperaba una lista no vacía en 'registros'")
+    registros = [_validar_registro(registro) for registro in registros]
+    probabilidades = await request.app['lotes'].predecir(registros)
+    return web.json_response({'probabilidades': probabilidades})
+
+async def metricas(request):
+    cuerpo = request.app['metricas'].resumen()
+    cuerpo['cache'] = request.app['lotes'].cache.estadisticas()
+    return web.json_response(cuerpo)
+
+async def salud(request):
+    return web.json_response({'estado': 'ok'})
+
+@web.middleware
+async def medir_latencia(request, handler):
+    if not request.path.startswith('/predecir'):
+        return await handler(request)
+    inicio = time.perf_counter()
+    try:
+        return await handler(request)
+    finally:
+        request.app['metricas'].registrar(time.perf_counter() - inicio)
+
+def crear_app(modelo):
+    app = web.Application(middlewares=[medir_latencia])
+    app['lotes'] = MicroLotes(modelo)
+    # Las métricas se actualizan en el lugar: la app no admite reasignar claves una vez iniciada
+    app['metricas'] = MetricasServicio()
+
+    async def al_iniciar(app):
+        app['lotes'].iniciar()
+
+    async def al_cerrar(app):
+        await app['lotes'].detener()
+
+    app.on_startup.append(al_iniciar)
+    app.on_cleanup.append(al_cerrar)
+    app.router.add_post('/predecir', predecir)
+    app.router.add_post('/predecir/lote', predecir_lote)
+    app.router.add_get('/metricas', metricas)
+    app.router.add_get('/salud', salud)
+    return app
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio HTTP de predicción de libros solicitados")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--puerto', type=int, default=8600)
+    parser.add_argument('--modelo', default=None,
+                        help="Nombre del modelo; por defecto el primero disponible")
+    args = parser.parse_args(argv)
+
+    modelos = cargar_modelos()
+    nombre = args.modelo or next(iter(modelos))
+    if nombre not in modelos:
+        parser.error(f"Modelo desconocido: {nombre}. Disponibles: {', '.join(modelos)}")
+    web.run_app(crear_app(modelos[nombre]), host=args.host, port=args.puerto)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import hashlib
+import os
+import unicodedata
+
+RUTA_MODELO = 'modelo_BLAA.pkl'
+
+# Modelos adicionales (reentrenamientos anuales, variantes A/B): cada .pkl del directorio
+DIRECTORIO_MODELOS = os.environ.get('BLAA_DIRECTORIO_MODELOS', 'modelos')
+
+def descubrir_modelos(directorio=DIRECTORIO_MODELOS):
+    """Nombre -> ruta del modelo principal y de cada .pkl del directorio (sin cargarlos)"""
+    rutas = {'Modelo Regresión Logística': RUTA_MODELO}
+    if os.path.isdir(directorio):
+        for archivo in sorted(os.listdir(directorio)):
+            nombre, extension = os.path.splitext(archivo)
+            if extension.lower() == '.pkl':
+                rutas.setdefault(nombre, os.path.join(directorio, archivo))
+    return rutas
+
+rutas_modelos = descubrir_modelos()
+
+columnas_modelo = ['Categoria', 'Author', 'Publisher']
+
+# Bandas de demanda: baja (<30%), media (30-70%) y alta (>70%)
+UMBRAL_BAJA = 0.3
+UMBRAL_ALTA = 0.7
+
+# Mapeo manual de columnas (normalización básica)
+mapeo_columnas = {
+    'editorial': 'Publisher',
+    'autor': 'Author',
+    'AUTOR': 'Author',
+    'autor(a)': 'Author',
+    'autor/a': 'Author',
+    'categoria': 'Categoria',
+    'Area Tematica': 'Categoria',
+    'ÁREA TEMÁTICA':'Categoria',
+    'publicador': 'Publisher',
+    'publisher': 'Publisher',
+    'EDITORIAL':'Publisher'
+}
+
+_huellas = {}
+
+def huella_modelo(ruta_modelo):
+    """SHA-256 del archivo del modelo, memorizado por ruta, tamaño y fecha de modificación"""
+    info = os.stat(ruta_modelo)
+    clave = (os.path.abspath(ruta_modelo), info.st_size, info.st_mtime_ns)
+    if clave not in _huellas:
+        sha = hashlib.sha256()
+        with open(ruta_modelo, 'rb') as archivo:
+            for bloque in iter(lambda: archivo.read(1 << 20), b''):
+                sha.update(bloque)
+        _huellas[clave] = sha.hexdigest()
+    return _huellas[clave]
+
+def directorio_compacto(ruta_modelo):
+    """Directorio donde se exporta la versión compacta de un modelo .pkl"""
+    return os.path.splitext(ruta_modelo)[0] + '_compacto'
+
+def cargar_modelo(ruta_modelo):
+    """Carga un modelo; usa su versión compacta si existe y corresponde al mismo .pkl"""
+    directorio = directorio_compacto(ruta_modelo)
+    if os.path.isdir(directorio):
+        # Import diferido: modelo_compacto depende de este módulo
+        from modelo_compacto import ModeloCompacto
+        compacto = ModeloCompacto(directorio)
+        if compacto.huella == huella_modelo(ruta_modelo):
+            return compacto
+    # Import diferido: joblib (y scikit-learn al deserializar) solo se cargan si hace falta el .pkl
+    import joblib
+    return joblib.load(ruta_modelo)
+
+def cargar_modelos():
+    """Registro de los modelos disponibles; cada uno se carga de disco la primera vez que se usa"""
+    # Import diferido: registro_modelos depende de este módulo
+    from registro_modelos import RegistroModelos
+    return RegistroModelos(rutas_modelos)
+
+def normalizar_texto(valor):
+    """Recorta y colapsa espacios en blanco; los valores no textuales quedan intactos"""
+    if isinstance(valor, str):
+        return ' '.join(valor.split())
+    return valor
+
+def plegar_texto(texto):
+    """Quita tildes, pasa a minúsculas y colapsa espacios para comparar textos"""
+    sin_tildes = unicodedata.normalize('NFKD', str(texto))
+    sin_tildes = ''.join(c for c in sin_tildes if not unicodedata.combining(c))
+    return ' '.join(sin_tildes.casefold().split())
+
+def bandas_probabilidad(probabilidades):
+    """0 = baja, 1 = media, 2 = alta demanda, con los mismos límites de las métricas de la app"""
+    return (probabilidades >= UMBRAL_BAJA).astype('int8') + (probabilidades > UMBRAL_ALTA)
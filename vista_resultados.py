@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Vista paginada de resultados.
+
+El DataFrame puntuado se queda en el servidor. El orden por probabilidad y la
+banda de demanda de cada fila se calculan una vez; cada combinación de filtro y
+orden se indexa la primera vez que se pide. Al navegador solo se envía la
+página visible, y el degradado de color se aplica únicamente a esas filas.
+"""
+
+import numpy as np
+import streamlit as st
+
+from utilidades_modelo import bandas_probabilidad
+
+filtros_banda = {
+    'Todas': None,
+    'Alta Demanda (>70%)': 2,
+    'Demanda Media (30-70%)': 1,
+    'Baja Demanda (<30%)': 0
+}
+
+ordenes = {
+    'Original': 'original',
+    'Probabilidad (mayor a menor)': 'desc',
+    'Probabilidad (menor a mayor)': 'asc'
+}
+
+TAMANOS_PAGINA = [50, 100, 250, 500]
+
+class ResultadosIndexados:
+    """Resultados con orden y bandas precalculados para paginar sin recorrer todo el DataFrame"""
+
+    def __init__(self, df, columna='Probabilidad'):
+        self.df = df
+        self.columna = columna
+        probabilidades = df[columna].to_numpy()
+        self.bandas = bandas_probabilidad(probabilidades)
+        self._desc = np.argsort(-probabilidades, kind='stable')
+        self._indices = {}
+
+    def __len__(self):
+        return len(self.df)
+
+    def indices(self, banda=None, orden='original'):
+        """Posiciones de las filas para un filtro de banda y un orden, memorizadas"""
+        clave = (banda, orden)
+        if clave not in self._indices:
+            if orden == 'desc':
+                posiciones = self._desc
+            elif orden == 'asc':
+                posiciones = self._desc[::-1]
+            else:
+                posiciones = np.arange(len(self.df))
+            if banda is not None:
+                posiciones = posiciones[self.bandas[posiciones] == banda]
+            self._indices[clave] = posiciones
+        return self._indices[clave]
+
+    def pagina(self, numero, tamano, banda=None, orden='original'):
+        """Filas de la página ``numero`` (desde 1)"""
+        posiciones = self.indices(banda, orden)
+        inicio = (numero - 1) * tamano
+        return self.df.iloc[posiciones[inicio:inicio + tamano]]
+
+def mostrar_resultados(resultados, clave='resultados'):
+    """Controles de filtro, orden y paginación, y la tabla de la página actual"""
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        filtro = st.selectbox("Banda de demanda", list(filtros_banda), key=f"{clave}_banda")
+    with col2:
+        orden = st.selectbox("Ordenar por", list(ordenes), key=f"{clave}_orden")
+    with col3:
+        tamano = st.selectbox("Filas por página", TAMANOS_PAGINA, index=1, key=f"{clave}_tamano")
+
+    banda, orden = filtros_banda[filtro], ordenes[orden]
+    total = len(resultados.indices(banda, orden))
+    paginas = max(1, -(-total // tamano))
+    numero = st.number_input(
+        f"Página (de {paginas:,})", min_value=1, max_value=paginas, value=1, step=1,
+        key=f"{clave}_pagina_{filtro}_{orden}_{tamano}"
+    )
+
+    pagina = resultados.pagina(int(numero), tamano, banda, orden)
+    st.dataframe(
+        pagina.style.background_gradient(
+            subset=[resultados.columna], cmap='RdYlGn', vmin=0.0, vmax=1.0
+        ).format({resultados.columna: '{:.5f}'}),
+        use_container_width=True
+    )
+    inicio = (int(numero) - 1) * tamano
+    st.caption(f"Mostrando filas {min(inicio + 1, total):,}–{inicio + len(pagina):,} de {total:,}")